@@ -1,358 +1,262 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import random
+import argparse
 import os
-import geopandas as gpd
+import queue
+import threading
+import time
+
+from answer_index import AnswerIndex, EXACT, OTHER, TYPO
+from autocomplete import Autocomplete
+from perf import (PhaseTimer, Profiler, build_report, env_flag, memory_usage, span, spans,
+                  write_report)
+from quiz_engine import CHOICE_COUNT, DIFFICULTIES, QuizEngine
+
+# Tryby gry
+MODE_NAME = "nazwa kraju"
+MODE_LOCATE = "wskaż na mapie"
+MODE_CHOICE = "wybór z listy"
+
+# Podpowiedzi są szukane dopiero po tylu ms bez kolejnego klawisza
+SUGGEST_DELAY_MS = 80
+# Klawisze obsługujące listę podpowiedzi - nie zmieniają wpisanego tekstu
+NAVIGATION_KEYS = ("Up", "Down", "Return", "KP_Enter", "Tab", "Escape")
+
+# Ciężkie biblioteki (matplotlib, geopandas) są importowane leniwie w wątku
+# roboczym, żeby okno pojawiło się od razu
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Geografia - Rozpoznaj Kraj")
+    parser.add_argument("--renderer", choices=("mpl", "tk"), default="mpl",
+                        help="mpl - mapa rysowana przez matplotlib, tk - natywne wielokąty tk.Canvas "
+                             "(bez importu matplotlib, szybszy start)")
+    parser.add_argument("--lod", action="store_true",
+                        help="rysuj tylko widoczne kraje, uproszczone do skali widoku "
+                             "(przydatne przy danych 50m/10m)")
+    parser.add_argument("--lean", action="store_true",
+                        help="oszczędny tryb pamięci: tylko potrzebne kolumny, kontynent jako kategoria, "
+                             "wspólna tablica nazw alternatywnych")
+    parser.add_argument("--float32", action="store_true",
+                        help="współrzędne w pamięci podręcznej geometrii w pojedynczej precyzji")
+    parser.add_argument("--lang", default=os.environ.get("KCK_LANG", "pl"), metavar="KOD",
+                        help="język nazw krajów - pakiet packs/KOD.json (domyślnie pl, także KCK_LANG)")
+    parser.add_argument("--image-cache", nargs="?", const="", metavar="KATALOG",
+                        help="pokazuj rundy z obrazów przygotowanych przez prerender.py "
+                             "(domyślnie .kck_cache/images obok danych)")
+    parser.add_argument("--hires", nargs="?", const="", metavar="PLIK",
+                        help="dociągaj dokładny kształt pokazywanego kraju z warstwy 50m/10m "
+                             "(domyślnie ne_10m/ne_50m tam, gdzie plik 110m)")
+    parser.add_argument("--no-animation", action="store_true",
+                        help="zmieniaj widok mapy skokiem, bez animowanego przejścia")
+    parser.add_argument("--progress", metavar="PLIK",
+                        help="plik postępów SQLite (domyślnie ~/.kck/postepy.sqlite)")
+    parser.add_argument("--no-progress", action="store_true",
+                        help="bez zapisu postępów - kraje losowane równomiernie")
+    parser.add_argument("--profile", action="store_true", default=env_flag("KCK_PROFILE"),
+                        help="profiluj cProfile i tracemalloc (także KCK_PROFILE=1); "
+                             "dane są wtedy ładowane w wątku głównym")
+    parser.add_argument("--perf-report", metavar="PLIK", default=os.environ.get("KCK_PERF_REPORT"),
+                        help="po zamknięciu zapisz raport wydajności JSON (także KCK_PERF_REPORT)")
+    parser.add_argument("--perf-overlay", action="store_true",
+                        help="pokazuj na ekranie percentyle czasu rundy i zużycie pamięci")
+    return parser.parse_args(argv)
+
 
 class GeographyApp:
-    def __init__(self, root):
+    def __init__(self, root, startup_timer=None, options=None):
         self.root = root
         self.root.title("Geografia - Rozpoznaj Kraj")
         self.root.geometry("1000x700")
         self.root.configure(bg="#f5f5f5")
 
-        # Zmienne aplikacji
-        self.score = 0
-        self.attempts = 0
-        self.current_country = None
-        self.current_difficulty = "world"
+        # Pomiar czasu faz uruchamiania
+        self.startup_timer = startup_timer or PhaseTimer()
+        self.options = options or parse_args([])
+
+        # Cała logika quizu (dane, losowanie, punktacja) jest w silniku;
+        # aplikacja tylko go wyświetla. Silnik powstaje po załadowaniu danych.
+        self.engine = None
+        # Czy w trybie "wskaż na mapie" padło już kliknięcie w tej rundzie
+        self.round_answered = False
+        # Renderowanie następnej rundy w tle; "pokolenie" rośnie przy każdej zmianie
+        # ustawień gry, co unieważnia obrazy zlecone wcześniej
+        self.prefetcher = None
+        self.prefetch_generation = 0
+        # Gotowe obrazy rund z prerender.py (opcja --image-cache)
+        self.image_cache = None
+        # Dokładne geometrie krajów z warstwy 50m/10m (opcja --hires)
+        self.hires = None
+        # Geometrie uproszczone dla poziomów szczegółowości (opcja --lod, liczone w wątku roboczym)
+        self.lod_levels = None
+        # Podpowiedzi nazw krajów (budowane raz przy ładowaniu danych)
+        self.autocomplete = None
+        self._suggest_job = None
 
         # Utworzenie interfejsu
-        self.create_widgets()
+        with self.startup_timer.phase("widżety"):
+            self.create_widgets()
+        self.root.bind("<Map>", self._on_first_map, add="+")
+
+        # Ładowanie danych geograficznych w tle - wynik trafia do kolejki,
+        # którą pętla Tk sprawdza przez after()
+        self._load_queue = queue.Queue()
+        if self.options.profile:
+            # cProfile widzi tylko swój wątek - przy profilowaniu ładujemy w wątku głównym
+            self.load_geography_data()
+        else:
+            threading.Thread(target=self.load_geography_data, name="geo-loader", daemon=True).start()
+        self.root.after(20, self._poll_loading)
 
-        # Ładowanie danych geograficznych
-        self.load_geography_data()
-
-        # Rozpoczęcie pierwszej rundy
-        self.start_new_round()
+    def _on_first_map(self, event):
+        if event.widget is self.root:
+            self.root.unbind("<Map>")
+            self.startup_timer.mark("pierwsze okno")
+            self.startup_timer.check_first_window()
 
     def load_geography_data(self):
+        """Wczytuje biblioteki i dane w wątku roboczym - bez dotykania widżetów Tk"""
         try:
-            # Ścieżka do pliku shapefile - dostosuj ją do swojej struktury katalogów
-            shapefile_path = "data/ne_110m_admin_0_countries.shp"
-
-            # Alternatywne ścieżki, jeśli plik nie znajduje się w katalogu data
-            alternative_paths = [
-                "ne_110m_admin_0_countries.shp",  # w katalogu głównym
-                "../data/ne_110m_admin_0_countries.shp",  # jeden poziom wyżej
-                os.path.join(os.path.expanduser("~"), "Downloads", "ne_110m_admin_0_countries.shp")  # w katalogu Downloads
-            ]
-
-            # Sprawdź, czy główna ścieżka istnieje
-            if os.path.exists(shapefile_path):
-                self.world_data = gpd.read_file(shapefile_path)
-            else:
-                # Spróbuj alternatywnych ścieżek
-                for path in alternative_paths:
-                    if os.path.exists(path):
-                        shapefile_path = path
-                        self.world_data = gpd.read_file(path)
-                        break
-                else:
-                    # Jeśli nie znaleziono pliku, wyświetl instrukcje
-                    messagebox.showinfo("Brak danych geograficznych",
-                                        "Nie znaleziono pliku z danymi geograficznymi.\n\n"
-                                        "Aby pobrać dane:\n"
-                                        "1. Odwiedź stronę https://www.naturalearthdata.com/downloads/110m-cultural-vectors/\n"
-                                        "2. Pobierz plik 'Admin 0 – Countries'\n"
-                                        "3. Rozpakuj archiwum do katalogu 'data' w folderze aplikacji\n")
-
-                    # Utwórz pusty GeoDataFrame
-                    self.world_data = self.create_empty_geodataframe()
-                    return
-
-            # Sprawdź nazwy kolumn w danych
-            if 'NAME' in self.world_data.columns:
-                self.world_data = self.world_data.rename(columns={'NAME': 'name'})
-            elif 'ADMIN' in self.world_data.columns:
-                self.world_data = self.world_data.rename(columns={'ADMIN': 'name'})
-
-            # Sprawdź, czy jest kolumna z kontynentami
-            if 'CONTINENT' in self.world_data.columns:
-                self.world_data = self.world_data.rename(columns={'CONTINENT': 'continent'})
-            elif 'REGION_WB' in self.world_data.columns:
-                self.world_data = self.world_data.rename(columns={'REGION_WB': 'continent'})
-            elif 'REGION_UN' in self.world_data.columns:
-                self.world_data = self.world_data.rename(columns={'REGION_UN': 'continent'})
+            if self.options.renderer == "tk":
+                with self.startup_timer.phase("import renderera tk"):
+                    import tk_canvas_renderer  # noqa: F401
             else:
-                # Jeśli nie ma kolumny z kontynentami, użyj przybliżonych wartości
-                self.world_data['continent'] = "Unknown"
-
-                # Przypisanie kontynentów na podstawie położenia (bardzo uproszczone)
-                europe_countries = ['Albania', 'Andorra', 'Austria', 'Belarus', 'Belgium', 'Bosnia and Herzegovina',
-                                    'Bulgaria', 'Croatia', 'Czech Republic', 'Denmark', 'Estonia', 'Finland',
-                                    'France', 'Germany', 'Greece', 'Hungary', 'Iceland', 'Ireland', 'Italy',
-                                    'Latvia', 'Liechtenstein', 'Lithuania', 'Luxembourg', 'Malta', 'Moldova',
-                                    'Monaco', 'Montenegro', 'Netherlands', 'North Macedonia', 'Norway', 'Poland',
-                                    'Portugal', 'Romania', 'Russia', 'San Marino', 'Serbia', 'Slovakia', 'Slovenia',
-                                    'Spain', 'Sweden', 'Switzerland', 'Ukraine', 'United Kingdom', 'Vatican City']
-
-                asia_countries = ['Afghanistan', 'Armenia', 'Azerbaijan', 'Bahrain', 'Bangladesh', 'Bhutan',
-                                  'Brunei', 'Cambodia', 'China', 'Cyprus', 'Georgia', 'India', 'Indonesia',
-                                  'Iran', 'Iraq', 'Israel', 'Japan', 'Jordan', 'Kazakhstan', 'Kuwait', 'Kyrgyzstan',
-                                  'Laos', 'Lebanon', 'Malaysia', 'Maldives', 'Mongolia', 'Myanmar', 'Nepal',
-                                  'North Korea', 'Oman', 'Pakistan', 'Palestine', 'Philippines', 'Qatar',
-                                  'Saudi Arabia', 'Singapore', 'South Korea', 'Sri Lanka', 'Syria', 'Taiwan',
-                                  'Tajikistan', 'Thailand', 'Timor-Leste', 'Turkey', 'Turkmenistan', 'United Arab Emirates',
-                                  'Uzbekistan', 'Vietnam', 'Yemen']
-
-                africa_countries = ['Algeria', 'Angola', 'Benin', 'Botswana', 'Burkina Faso', 'Burundi',
-                                    'Cabo Verde', 'Cameroon', 'Central African Republic', 'Chad', 'Comoros',
-                                    'Congo', 'Djibouti', 'Egypt', 'Equatorial Guinea', 'Eritrea', 'Eswatini',
-                                    'Ethiopia', 'Gabon', 'Gambia', 'Ghana', 'Guinea', 'Guinea-Bissau', 'Ivory Coast',
-                                    'Kenya', 'Lesotho', 'Liberia', 'Libya', 'Madagascar', 'Malawi', 'Mali',
-                                    'Mauritania', 'Mauritius', 'Morocco', 'Mozambique', 'Namibia', 'Niger',
-                                    'Nigeria', 'Rwanda', 'Sao Tome and Principe', 'Senegal', 'Seychelles',
-                                    'Sierra Leone', 'Somalia', 'South Africa', 'South Sudan', 'Sudan', 'Tanzania',
-                                    'Togo', 'Tunisia', 'Uganda', 'Zambia', 'Zimbabwe']
-
-                north_america_countries = ['Antigua and Barbuda', 'Bahamas', 'Barbados', 'Belize', 'Canada',
-                                           'Costa Rica', 'Cuba', 'Dominica', 'Dominican Republic', 'El Salvador',
-                                           'Grenada', 'Guatemala', 'Haiti', 'Honduras', 'Jamaica', 'Mexico',
-                                           'Nicaragua', 'Panama', 'Saint Kitts and Nevis', 'Saint Lucia',
-                                           'Saint Vincent and the Grenadines', 'Trinidad and Tobago', 'United States']
-
-                south_america_countries = ['Argentina', 'Bolivia', 'Brazil', 'Chile', 'Colombia', 'Ecuador',
-                                           'Guyana', 'Paraguay', 'Peru', 'Suriname', 'Uruguay', 'Venezuela']
-
-                oceania_countries = ['Australia', 'Fiji', 'Kiribati', 'Marshall Islands', 'Micronesia',
-                                     'Nauru', 'New Zealand', 'Palau', 'Papua New Guinea', 'Samoa', 'Solomon Islands',
-                                     'Tonga', 'Tuvalu', 'Vanuatu']
-
-                # Przypisanie kontynentów na podstawie nazw krajów
-                for i, row in self.world_data.iterrows():
-                    country_name = row['name']
-                    if country_name in europe_countries:
-                        self.world_data.at[i, 'continent'] = 'Europe'
-                    elif country_name in asia_countries:
-                        self.world_data.at[i, 'continent'] = 'Asia'
-                    elif country_name in africa_countries:
-                        self.world_data.at[i, 'continent'] = 'Africa'
-                    elif country_name in north_america_countries:
-                        self.world_data.at[i, 'continent'] = 'North America'
-                    elif country_name in south_america_countries:
-                        self.world_data.at[i, 'continent'] = 'South America'
-                    elif country_name in oceania_countries:
-                        self.world_data.at[i, 'continent'] = 'Oceania'
-
-            # Słownik z polskimi nazwami krajów
-            polish_names = {
-                'Afghanistan': ['afganistan'],
-                'Albania': ['albania'],
-                'Algeria': ['algieria'],
-                'Andorra': ['andora'],
-                'Angola': ['angola'],
-                'Antigua and Barbuda': ['antigua i barbuda'],
-                'Argentina': ['argentyna'],
-                'Armenia': ['armenia'],
-                'Australia': ['australia'],
-                'Austria': ['austria'],
-                'Azerbaijan': ['azerbejdżan'],
-                'Bahamas': ['bahamy'],
-                'Bahrain': ['bahrajn'],
-                'Bangladesh': ['bangladesz'],
-                'Barbados': ['barbados'],
-                'Belarus': ['białoruś'],
-                'Belgium': ['belgia'],
-                'Belize': ['belize'],
-                'Benin': ['benin'],
-                'Bhutan': ['bhutan'],
-                'Bolivia': ['boliwia'],
-                'Bosnia and Herzegovina': ['bośnia i hercegowina'],
-                'Botswana': ['botswana'],
-                'Brazil': ['brazylia'],
-                'Brunei': ['brunei'],
-                'Bulgaria': ['bułgaria'],
-                'Burkina Faso': ['burkina faso'],
-                'Burundi': ['burundi'],
-                'Cambodia': ['kambodża'],
-                'Cameroon': ['kamerun'],
-                'Canada': ['kanada'],
-                'Cape Verde': ['republika zielonego przylądka', 'zielony przylądek'],
-                'Central African Republic': ['republika środkowoafrykańska'],
-                'Chad': ['czad'],
-                'Chile': ['chile'],
-                'China': ['chiny'],
-                'Colombia': ['kolumbia'],
-                'Comoros': ['komory'],
-                'Costa Rica': ['kostaryka'],
-                'Croatia': ['chorwacja'],
-                'Cuba': ['kuba'],
-                'Cyprus': ['cypr'],
-                'Czech Republic': ['czechy', 'republika czeska'],
-                'Democratic Republic of the Congo': ['demokratyczna republika konga'],
-                'Denmark': ['dania'],
-                'Djibouti': ['dżibuti'],
-                'Dominica': ['dominika'],
-                'Dominican Republic': ['dominikana', 'republika dominikańska'],
-                'East Timor': ['timor wschodni'],
-                'Ecuador': ['ekwador'],
-                'Egypt': ['egipt'],
-                'El Salvador': ['salwador'],
-                'Equatorial Guinea': ['gwinea równikowa'],
-                'Eritrea': ['erytrea'],
-                'Estonia': ['estonia'],
-                'Eswatini': ['eswatini', 'suazi'],
-                'Ethiopia': ['etiopia'],
-                'Fiji': ['fidżi'],
-                'Finland': ['finlandia'],
-                'France': ['francja'],
-                'Gabon': ['gabon'],
-                'Gambia': ['gambia'],
-                'Georgia': ['gruzja'],
-                'Germany': ['niemcy'],
-                'Ghana': ['ghana'],
-                'Greece': ['grecja'],
-                'Grenada': ['grenada'],
-                'Guatemala': ['gwatemala'],
-                'Guinea': ['gwinea'],
-                'Guinea-Bissau': ['gwinea bissau'],
-                'Guyana': ['gujana'],
-                'Haiti': ['haiti'],
-                'Honduras': ['honduras'],
-                'Hungary': ['węgry'],
-                'Iceland': ['islandia'],
-                'India': ['indie'],
-                'Indonesia': ['indonezja'],
-                'Iran': ['iran'],
-                'Iraq': ['irak'],
-                'Ireland': ['irlandia'],
-                'Israel': ['izrael'],
-                'Italy': ['włochy'],
-                'Ivory Coast': ['wybrzeże kości słoniowej'],
-                'Jamaica': ['jamajka'],
-                'Japan': ['japonia'],
-                'Jordan': ['jordania'],
-                'Kazakhstan': ['kazachstan'],
-                'Kenya': ['kenia'],
-                'Kiribati': ['kiribati'],
-                'Kosovo': ['kosowo'],
-                'Kuwait': ['kuwejt'],
-                'Kyrgyzstan': ['kirgistan'],
-                'Laos': ['laos'],
-                'Latvia': ['łotwa'],
-                'Lebanon': ['liban'],
-                'Lesotho': ['lesotho'],
-                'Liberia': ['liberia'],
-                'Libya': ['libia'],
-                'Liechtenstein': ['liechtenstein'],
-                'Lithuania': ['litwa'],
-                'Luxembourg': ['luksemburg'],
-                'Madagascar': ['madagaskar'],
-                'Malawi': ['malawi'],
-                'Malaysia': ['malezja'],
-                'Maldives': ['malediwy'],
-                'Mali': ['mali'],
-                'Malta': ['malta'],
-                'Marshall Islands': ['wyspy marshalla'],
-                'Mauritania': ['mauretania'],
-                'Mauritius': ['mauritius'],
-                'Mexico': ['meksyk'],
-                'Micronesia': ['mikronezja'],
-                'Moldova': ['mołdawia'],
-                'Monaco': ['monako'],
-                'Mongolia': ['mongolia'],
-                'Montenegro': ['czarnogóra'],
-                'Morocco': ['maroko'],
-                'Mozambique': ['mozambik'],
-                'Myanmar': ['birma', 'mjanma'],
-                'Namibia': ['namibia'],
-                'Nauru': ['nauru'],
-                'Nepal': ['nepal'],
-                'Netherlands': ['holandia', 'niderlandy'],
-                'New Zealand': ['nowa zelandia'],
-                'Nicaragua': ['nikaragua'],
-                'Niger': ['niger'],
-                'Nigeria': ['nigeria'],
-                'North Korea': ['korea północna'],
-                'North Macedonia': ['macedonia północna'],
-                'Norway': ['norwegia'],
-                'Oman': ['oman'],
-                'Pakistan': ['pakistan'],
-                'Palau': ['palau'],
-                'Palestine': ['palestyna'],
-                'Panama': ['panama'],
-                'Papua New Guinea': ['papua-nowa gwinea'],
-                'Paraguay': ['paragwaj'],
-                'Peru': ['peru'],
-                'Philippines': ['filipiny'],
-                'Poland': ['polska'],
-                'Portugal': ['portugalia'],
-                'Qatar': ['katar'],
-                'Republic of the Congo': ['republika konga', 'kongo'],
-                'Romania': ['rumunia'],
-                'Russia': ['rosja'],
-                'Rwanda': ['rwanda'],
-                'Saint Kitts and Nevis': ['saint kitts i nevis'],
-                'Saint Lucia': ['saint lucia'],
-                'Saint Vincent and the Grenadines': ['saint vincent i grenadyny'],
-                'Samoa': ['samoa'],
-                'San Marino': ['san marino'],
-                'Saudi Arabia': ['arabia saudyjska'],
-                'Senegal': ['senegal'],
-                'Serbia': ['serbia'],
-                'Seychelles': ['seszele'],
-                'Sierra Leone': ['sierra leone'],
-                'Singapore': ['singapur'],
-                'Slovakia': ['słowacja'],
-                'Slovenia': ['słowenia'],
-                'Solomon Islands': ['wyspy salomona'],
-                'Somalia': ['somalia'],
-                'South Africa': ['republika południowej afryki', 'rpa'],
-                'South Korea': ['korea południowa'],
-                'South Sudan': ['sudan południowy'],
-                'Spain': ['hiszpania'],
-                'Sri Lanka': ['sri lanka'],
-                'Sudan': ['sudan'],
-                'Suriname': ['surinam'],
-                'Sweden': ['szwecja'],
-                'Switzerland': ['szwajcaria'],
-                'Syria': ['syria'],
-                'Taiwan': ['tajwan'],
-                'Tajikistan': ['tadżykistan'],
-                'Tanzania': ['tanzania'],
-                'Thailand': ['tajlandia'],
-                'Togo': ['togo'],
-                'Tonga': ['tonga'],
-                'Trinidad and Tobago': ['trynidad i tobago'],
-                'Tunisia': ['tunezja'],
-                'Turkey': ['turcja'],
-                'Turkmenistan': ['turkmenistan'],
-                'Tuvalu': ['tuvalu'],
-                'Uganda': ['uganda'],
-                'Ukraine': ['ukraina'],
-                'United Arab Emirates': ['zjednoczone emiraty arabskie', 'emiraty arabskie', 'zea'],
-                'United Kingdom': ['wielka brytania', 'zjednoczone królestwo', 'anglia', 'uk'],
-                'United States': ['stany zjednoczone', 'usa', 'ameryka'],
-                'Uruguay': ['urugwaj'],
-                'Uzbekistan': ['uzbekistan'],
-                'Vanuatu': ['vanuatu'],
-                'Vatican City': ['watykan'],
-                'Venezuela': ['wenezuela'],
-                'Vietnam': ['wietnam'],
-                'Yemen': ['jemen'],
-                'Zambia': ['zambia'],
-                'Zimbabwe': ['zimbabwe']
-            }
-
-            # Dodanie kolumny z alternatywnymi nazwami
-            self.world_data['alt_names'] = self.world_data['name'].apply(
-                lambda x: polish_names.get(x, []) + [x.lower()]
-            )
-
-            print(f"Załadowano {len(self.world_data)} krajów")
-
-            # Zapisanie granic całego świata do późniejszego użycia
-            self.world_bounds = self.world_data.total_bounds
-
+                with self.startup_timer.phase("import matplotlib"):
+                    import map_renderer  # noqa: F401 - rozgrzanie importu przed użyciem w wątku Tk
+                    from matplotlib.backends import backend_tkagg  # noqa: F401
+
+            with self.startup_timer.phase("import geopandas"):
+                import geo_data
+
+            shapefile_path = geo_data.find_shapefile()
+            if shapefile_path is None:
+                self._load_queue.put(("missing", QuizEngine(geo_data.create_empty_geodataframe())))
+                return
+
+            # Nazwy krajów z pakietu wybranego języka (bez pakietu - domyślny)
+            locale = self.options.lang
+            if locale not in geo_data.name_packs.available_locales():
+                print(f"Brak pakietu nazw '{locale}' - nazwy w języku {geo_data.name_packs.DEFAULT_LOCALE}")
+                locale = geo_data.name_packs.DEFAULT_LOCALE
+
+            with self.startup_timer.phase("wczytanie danych"):
+                world_data = geo_data.load_world_data(shapefile_path, lean=self.options.lean,
+                                                      float32=self.options.float32, locale=locale)
+
+            # Widoki krajów liczone raz - runda tylko odczytuje wiersz tabeli
+            with self.startup_timer.phase("tabela widoków"):
+                import viewports
+                viewport_index = viewports.build_viewport_index(world_data)
+
+            # Poziomy szczegółowości - przy dużych danych sekundy, więc nie w wątku Tk
+            if self.options.lod and self.options.renderer == "mpl":
+                with self.startup_timer.phase("poziomy szczegółowości"):
+                    from map_renderer import simplify_levels
+                    self.lod_levels = simplify_levels(world_data.geometry.values)
+
+            # Indeks odpowiedzi (znormalizowane nazwy + wyszukiwanie literówek)
+            with self.startup_timer.phase("indeks odpowiedzi"):
+                answer_index = AnswerIndex.from_world_data(world_data)
+
+            # Posortowane nazwy do podpowiedzi w polu odpowiedzi
+            with self.startup_timer.phase("podpowiedzi"):
+                self.autocomplete = Autocomplete.from_world_data(world_data)
+
+            # Drzewo przestrzenne do trybu "wskaż na mapie"
+            with self.startup_timer.phase("indeks przestrzenny"):
+                from hit_test import CountryLocator
+                locator = CountryLocator(world_data.geometry.values)
+
+            # Sąsiedzi krajów do trybu "wybór z listy" (zapisywani obok pamięci podręcznej geometrii)
+            with self.startup_timer.phase("graf sąsiedztwa"):
+                import adjacency
+                adjacency_graph = adjacency.load_adjacency(shapefile_path, world_data)
+
+            # Historia odpowiedzi gracza - przy starcie tylko podsumowania krajów
+            progress = None
+            if not self.options.no_progress:
+                with self.startup_timer.phase("postępy"):
+                    import progress as progress_module
+                    try:
+                        progress = progress_module.Progress(
+                            self.options.progress or progress_module.default_path(), world_data['name'])
+                    except (OSError, progress_module.sqlite3.Error) as e:
+                        print(f"Nie udało się otworzyć pliku postępów: {e}")
+
+            self._load_queue.put(("ok", QuizEngine(world_data, viewport_index, answer_index,
+                                                   locator=locator, progress=progress,
+                                                   adjacency=adjacency_graph)))
         except Exception as e:
-            messagebox.showerror("Błąd", f"Nie udało się załadować danych geograficznych: {str(e)}")
-            self.world_data = self.create_empty_geodataframe()
+            self._load_queue.put(("error", e))
+
+    def _poll_loading(self):
+        try:
+            status, result = self._load_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(20, self._poll_loading)
+            return
+
+        if status == "missing":
+            # Jeśli nie znaleziono pliku, wyświetl instrukcje
+            messagebox.showinfo("Brak danych geograficznych",
+                                "Nie znaleziono pliku z danymi geograficznymi.\n\n"
+                                "Aby pobrać dane:\n"
+                                "1. Odwiedź stronę https://www.naturalearthdata.com/downloads/110m-cultural-vectors/\n"
+                                "2. Pobierz plik 'Admin 0 – Countries'\n"
+                                "3. Rozpakuj archiwum do katalogu 'data' w folderze aplikacji\n")
+            self.engine = result
+        elif status == "error":
+            messagebox.showerror("Błąd", f"Nie udało się załadować danych geograficznych: {str(result)}")
+            import geo_data
+            self.engine = QuizEngine(geo_data.create_empty_geodataframe())
+        else:
+            self.engine = result
+        self.engine.set_difficulty(self.difficulty_var.get())
+
+        self.on_data_loaded()
+
+    def on_data_loaded(self):
+        """Buduje mapę i rozpoczyna pierwszą rundę (wątek Tk)"""
+        with self.startup_timer.phase("budowa mapy"):
+            self.create_map_canvas()
+
+            world_data = self.engine.world_data
+            if len(world_data) > 0:
+                # Zapisanie granic całego świata do późniejszego użycia
+                self.world_bounds = world_data.total_bounds
+
+                # Warstwa świata jest budowana raz, kolejne rundy tylko podmieniają podświetlenie
+                self.renderer.set_world(world_data, self.lod_levels)
+
+                # Gotowe obrazy rund (w tle albo z prerender.py) są tylko dla matplotlib
+                if self.options.renderer == "mpl":
+                    from prefetch import RoundPrefetcher
+                    self.prefetcher = RoundPrefetcher(world_data, lod=self.options.lod, lod_levels=self.lod_levels)
+
+                if self.options.image_cache is not None and self.options.renderer == "mpl":
+                    import geo_data
+                    import prerender
+                    cache_dir = (self.options.image_cache
+                                 or prerender.default_cache_dir(geo_data.find_shapefile()))
+                    self.image_cache = prerender.ImageCache(cache_dir, world_data, self.engine.viewports)
+
+                if self.options.hires is not None:
+                    import hires
+                    hires_path = self.options.hires or hires.find_hires_shapefile()
+                    if hires_path is not None:
+                        self.hires = hires.HiresGeometry(hires_path, world_data)
+                    else:
+                        print("Nie znaleziono warstwy 50m/10m - mapa zostaje w rozdzielczości 110m")
+
+        # Wyniki z poprzednich sesji (plik postępów)
+        self.update_score()
+
+        # Rozpoczęcie pierwszej rundy
+        with self.startup_timer.phase("pierwsza runda"):
+            self.start_new_round()
 
-    def create_empty_geodataframe(self):
-        return gpd.GeoDataFrame(columns=['name', 'continent', 'alt_names', 'geometry'])
+        self.startup_timer.mark("gotowe")
+        print(self.startup_timer.report())
 
     def create_widgets(self):
         # Górny panel z tytułem i punktacją
@@ -374,27 +278,53 @@ class GeographyApp:
         self.accuracy_label = tk.Label(stats_frame, text="0%", bg="#f5f5f5", font=("Segoe UI", 12, "bold"))
         self.accuracy_label.pack(side=tk.LEFT, padx=(5, 0))
 
+        # Wyniki z całej historii (plik postępów)
+        self.total_label = tk.Label(stats_frame, text="", bg="#f5f5f5", fg="#808080", font=("Segoe UI", 10))
+        self.total_label.pack(side=tk.LEFT, padx=(15, 0))
+
         # Ramka dla mapy
         self.map_frame = tk.Frame(self.root, bg="white")
         self.map_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
 
-        # Utworzenie figury Matplotlib z określoną wielkością i DPI
-        self.fig, self.ax = plt.subplots(figsize=(10, 6), dpi=100)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.map_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # Mapa powstaje dopiero po załadowaniu danych - do tego czasu stan ładowania
+        self.loading_label = tk.Label(self.map_frame, text="Ładowanie mapy...", bg="white",
+                                      fg="#808080", font=("Segoe UI", 14))
+        self.loading_label.pack(fill=tk.BOTH, expand=True)
 
         # Panel odpowiedzi
         answer_frame = tk.Frame(self.root, bg="white", pady=15, padx=20)
         answer_frame.pack(fill=tk.X, padx=20, pady=10)
 
-        tk.Label(answer_frame, text="Jaki to kraj?", bg="white", font=("Segoe UI", 12)).pack()
+        self.question_label = tk.Label(answer_frame, text="Jaki to kraj?", bg="white", font=("Segoe UI", 12))
+        self.question_label.pack()
 
         self.answer_var = tk.StringVar()
-        answer_entry = ttk.Entry(answer_frame, textvariable=self.answer_var, font=("Segoe UI", 12), width=30)
-        answer_entry.pack(pady=10)
-        answer_entry.bind("<Return>", lambda e: self.check_answer())
-
-        button_frame = tk.Frame(answer_frame, bg="white")
+        self.answer_entry = ttk.Entry(answer_frame, textvariable=self.answer_var, font=("Segoe UI", 12), width=30)
+        self.answer_entry.pack(pady=10)
+        self.answer_entry.bind("<Return>", self.on_answer_return)
+        self.answer_entry.bind("<KP_Enter>", self.on_answer_return)
+
+        # Przyciski trybu "wybór z listy" - w tym trybie zastępują pole odpowiedzi
+        self.choice_frame = tk.Frame(answer_frame, bg="white")
+        self.choice_buttons = []
+        for _ in range(CHOICE_COUNT):
+            button = ttk.Button(self.choice_frame, width=24)
+            button.pack(side=tk.LEFT, padx=5)
+            self.choice_buttons.append(button)
+
+        # Lista podpowiedzi wyświetlana pod polem odpowiedzi, nad resztą panelu
+        self.suggestion_list = tk.Listbox(self.root, font=("Segoe UI", 11), activestyle="none",
+                                          exportselection=False, takefocus=0, height=0)
+        self.suggestion_list.bind("<ButtonRelease-1>", self.accept_suggestion)
+        self.answer_entry.bind("<KeyRelease>", self.on_answer_key)
+        self.answer_entry.bind("<Down>", lambda e: self.move_suggestion(1))
+        self.answer_entry.bind("<Up>", lambda e: self.move_suggestion(-1))
+        self.answer_entry.bind("<Tab>", self.accept_suggestion)
+        self.answer_entry.bind("<Escape>", lambda e: self.hide_suggestions())
+        # Opóźnienie, żeby kliknięcie w listę zdążyło ją obsłużyć
+        self.answer_entry.bind("<FocusOut>", lambda e: self.root.after(150, self.hide_suggestions))
+
+        self.button_frame = button_frame = tk.Frame(answer_frame, bg="white")
         button_frame.pack(pady=5)
 
         check_btn = ttk.Button(button_frame, text="Sprawdź", command=self.check_answer)
@@ -414,142 +344,387 @@ class GeographyApp:
 
         self.difficulty_var = tk.StringVar(value="world")
         difficulty_combo = ttk.Combobox(difficulty_frame, textvariable=self.difficulty_var, width=15)
-        difficulty_combo['values'] = ('world', 'europe', 'asia', 'africa', 'americas', 'oceania')
+        difficulty_combo['values'] = DIFFICULTIES
         difficulty_combo.pack(side=tk.LEFT, padx=10)
         difficulty_combo.bind("<<ComboboxSelected>>", self.change_difficulty)
 
+        tk.Label(difficulty_frame, text="Tryb gry:", bg="#f5f5f5").pack(side=tk.LEFT, padx=(20, 0))
+
+        self.mode_var = tk.StringVar(value=MODE_NAME)
+        mode_combo = ttk.Combobox(difficulty_frame, textvariable=self.mode_var, width=18, state="readonly")
+        mode_combo['values'] = (MODE_NAME, MODE_LOCATE, MODE_CHOICE)
+        mode_combo.pack(side=tk.LEFT, padx=10)
+        mode_combo.bind("<<ComboboxSelected>>", self.change_difficulty)
+
+        # Nakładka z pomiarami wydajności w rogu mapy (opcja --perf-overlay)
+        if self.options.perf_overlay:
+            self.perf_label = tk.Label(self.map_frame, text="", bg="#ffffe0", fg="#404040",
+                                       font=("Consolas", 9), justify=tk.LEFT)
+            self.perf_label.place(x=5, rely=1.0, y=-5, anchor="sw")
+            self.root.after(500, self.update_perf_overlay)
+
+    def update_perf_overlay(self):
+        summary = spans.summary()
+        lines = []
+        for name in ("runda", "runda: wyświetlenie", "odpowiedź", "kliknięcie", "rysowanie: pełne", "rysowanie: blit",
+                     "rysowanie: gotowy obraz", "rysowanie: tk", "animacja: klatka"):
+            stats = summary.get(name)
+            if stats:
+                lines.append(f"{name}: p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms "
+                             f"(n={stats['count']})")
+        memory = memory_usage()
+        if "rss_mb" in memory:
+            lines.append(f"pamięć: {memory['rss_mb']:.0f} MB")
+        self.perf_label.config(text="\n".join(lines))
+        # Płótno mapy powstaje później i przykryłoby nakładkę
+        self.perf_label.lift()
+        self.root.after(500, self.update_perf_overlay)
+
+    def create_map_canvas(self):
+        self.loading_label.destroy()
+
+        if self.options.renderer == "tk":
+            # Natywne wielokąty Tk - matplotlib w ogóle nie jest importowany
+            from tk_canvas_renderer import TkCanvasRenderer
+            self.renderer = TkCanvasRenderer(self.map_frame)
+        else:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            from map_renderer import MapRenderer
+
+            # Utworzenie figury Matplotlib z określoną wielkością i DPI
+            self.fig = Figure(figsize=(10, 6), dpi=100)
+            self.ax = self.fig.add_subplot()
+            self.canvas = FigureCanvasTkAgg(self.fig, master=self.map_frame)
+            self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            self.renderer = MapRenderer(self.fig, self.ax, self.canvas, lod=self.options.lod)
+        self.renderer.connect_click(self.on_map_click)
+        # Animowane przejścia między widokami (wyłączane samoczynnie na wolnym komputerze)
+        from zoom import ZoomAnimator
+        self.animator = ZoomAnimator(self.root, self.renderer, enabled=not self.options.no_animation)
+
+        # Przycisk "Pokaż cały świat" tworzymy raz, a nie w każdej rundzie
+        show_world_btn = ttk.Button(self.map_frame, text="Pokaż cały świat",
+                                    command=self.show_world_view)
+        show_world_btn.place(relx=0.9, rely=0.05, anchor="ne")
+
     def change_difficulty(self, event=None):
-        self.current_difficulty = self.difficulty_var.get()
+        """Zmiana poziomu trudności lub trybu gry - obraz liczony w tle przestaje być ważny"""
+        self.prefetch_generation += 1
+        if self.prefetcher is not None:
+            self.prefetcher.invalidate()
+        if self.engine is not None:
+            self.engine.set_difficulty(self.difficulty_var.get())
         self.start_new_round()
 
-    def get_filtered_countries(self):
-        if len(self.world_data) == 0:
-            return gpd.GeoDataFrame()
-
-        if self.current_difficulty == "world":
-            return self.world_data
-        elif self.current_difficulty == "europe":
-            return self.world_data[self.world_data['continent'] == "Europe"]
-        elif self.current_difficulty == "asia":
-            return self.world_data[self.world_data['continent'] == "Asia"]
-        elif self.current_difficulty == "africa":
-            return self.world_data[self.world_data['continent'] == "Africa"]
-        elif self.current_difficulty == "americas":
-            return self.world_data[
-                (self.world_data['continent'] == "North America") |
-                (self.world_data['continent'] == "South America")
-                ]
-        elif self.current_difficulty == "oceania":
-            return self.world_data[self.world_data['continent'] == "Oceania"]
-        return self.world_data
-
     def start_new_round(self):
+        # Odcinek "runda" trwa do końca wyświetlenia rundy (po animacji przejścia) -
+        # zamykają go show_round i show_region
+        started = time.perf_counter()
+
         # Wyczyszczenie pola odpowiedzi i informacji zwrotnej
         self.answer_var.set("")
         self.feedback_label.config(text="")
+        self.hide_suggestions()
 
-        # Filtrowanie krajów według poziomu trudności
-        filtered_countries = self.get_filtered_countries()
-
-        # Wybór losowego kraju
-        if len(filtered_countries) > 0:
-            random_index = random.randint(0, len(filtered_countries) - 1)
-            self.current_country = filtered_countries.iloc[random_index]
-
-            # Wyczyszczenie poprzedniego wykresu
-            self.ax.clear()
-
-            # Wyświetlenie mapy świata jako tło z lepszymi kolorami
-            self.world_data.plot(ax=self.ax, color='#e0e0e0', edgecolor='#c0c0c0', linewidth=0.5)
-
-            # Wyświetlenie wybranego kraju
-            country_geom = filtered_countries[filtered_countries['name'] == self.current_country['name']]
-            country_geom.plot(ax=self.ax, color='#66b3ff', edgecolor='#0066cc', linewidth=1)
-
-            # Ukrycie etykiet osi
-            self.ax.set_xticks([])
-            self.ax.set_yticks([])
-            self.ax.set_axis_off()
-
-            # Przybliżenie do wybranego kraju z większym marginesem
-            # Pobierz granice kraju
-            minx, miny, maxx, maxy = country_geom.total_bounds
-
-            # Oblicz środek kraju
-            center_x = (minx + maxx) / 2
-            center_y = (miny + maxy) / 2
-
-            # Oblicz szerokość i wysokość kraju
-            width = maxx - minx
-            height = maxy - miny
-
-            # Użyj większego z wymiarów do określenia skali
-            size = max(width, height)
+        # Dane jeszcze się ładują - pierwszą rundę rozpocznie on_data_loaded
+        if self.engine is None:
+            return
 
-            # Dodaj znacznie większy margines (5x rozmiar kraju)
-            margin_factor = 5.0  # Możesz dostosować tę wartość
+        # Wybór losowego kraju według poziomu trudności
+        country_index = self.engine.start_round()
+        if country_index is None:
+            messagebox.showwarning("Ostrzeżenie", "Brak krajów dla wybranego poziomu trudności")
+            return
 
-            # Ustaw granice widoku mapy zachowując proporcje
-            self.ax.set_xlim(center_x - size * margin_factor / 2, center_x + size * margin_factor / 2)
-            self.ax.set_ylim(center_y - size * margin_factor / 2, center_y + size * margin_factor / 2)
+        # W trybie "wybór z listy" zamiast pola odpowiedzi są przyciski z nazwami
+        if self.mode_var.get() == MODE_CHOICE:
+            if not self.choice_frame.winfo_manager():
+                self.answer_entry.pack_forget()
+                self.choice_frame.pack(pady=10, before=self.button_frame)
+        elif self.choice_frame.winfo_manager():
+            self.choice_frame.pack_forget()
+            self.answer_entry.pack(pady=10, before=self.button_frame)
+
+        self.round_answered = False
+        if self.mode_var.get() == MODE_LOCATE:
+            # Tryb "wskaż na mapie": widok całego regionu bez podświetlenia
+            self.answer_entry.state(["disabled"])
+            self.question_label.config(text=f"Wskaż na mapie: {self.engine.display_name(country_index)}")
+            region_view = self.engine.region_view()
+            self.animator.animate(region_view, lambda: self.show_region(region_view, started))
+            return
 
-            # Dodaj przycisk "Pokaż cały świat"
-            show_world_btn = ttk.Button(self.map_frame, text="Pokaż cały świat",
-                                        command=self.show_world_view)
-            show_world_btn.place(relx=0.9, rely=0.05, anchor="ne")
+        if self.mode_var.get() == MODE_CHOICE:
+            # Właściwy kraj i jego sąsiedzi (graf policzony przy ładowaniu)
+            choices = self.engine.choices()
+            for position, button in enumerate(self.choice_buttons):
+                if position < len(choices):
+                    index = choices[position]
+                    button.config(text=self.engine.display_name(index), command=lambda i=index: self.check_answer(i))
+                    button.state(["!disabled"])
+                    if not button.winfo_manager():
+                        button.pack(side=tk.LEFT, padx=5)
+                else:
+                    # Mało krajów na poziomie trudności - zbędne przyciski znikają
+                    button.config(text="", command="")
+                    button.state(["disabled"])
+                    button.pack_forget()
+        self.answer_entry.state(["!disabled"])
+        self.question_label.config(text="Jaki to kraj?")
+
+        # Przybliżenie do wybranego kraju - widok z tabeli policzonej przy ładowaniu
+        # (kadruje główną część kraju, bez odległych terytoriów zamorskich)
+        view = self.engine.current_view()
+
+        # Obraz tej rundy mógł już powstać w tle albo w prerender.py - wtedy tylko
+        # go kopiujemy; w przeciwnym razie podmiana podświetlenia i odświeżenie przez zapamiętane tło
+        frame = None
+        if self.prefetcher is not None:
+            frame = self.prefetcher.take(country_index, view, self.fig, self.prefetch_generation)
+        if frame is None and self.image_cache is not None:
+            frame = self.image_cache.read_rgba(country_index, self.fig)
+
+        # Dokładny kształt kraju jest wczytywany już w trakcie przejścia
+        if self.hires is not None:
+            self.hires.request(country_index)
+
+        # Przejście od poprzedniego widoku, na końcu zwykłe wyświetlenie rundy
+        self.animator.animate(view, lambda: self.show_round(country_index, view, frame, started), frame)
+
+    def show_round(self, index, view, frame=None, started=None):
+        """Wyświetla rundę w widoku docelowym (po animowanym przejściu)"""
+        with span("runda: wyświetlenie"):
+            if frame is None or not self.renderer.show_frame(index, view, frame):
+                self.renderer.show_country(index, view)
+
+            # Dokładny kształt kraju podmieni podświetlenie, gdy tylko zostanie wczytany
+            if self.hires is not None:
+                self.show_hires_detail(index)
+        if started is not None:
+            spans.record("runda", time.perf_counter() - started)
+
+        # Gdy gracz odpowiada, w tle powstaje obraz następnej rundy (nie w trakcie
+        # animacji - wątek roboczy zabierałby jej czas procesora)
+        self.root.after_idle(self.prefetch_next_round)
+
+    def show_region(self, view, started=None):
+        """Tryb "wskaż na mapie": widok całego regionu bez podświetlenia"""
+        with span("runda: wyświetlenie"):
+            self.renderer.clear_highlight()
+            self.renderer.show_world(view)
+        if started is not None:
+            spans.record("runda", time.perf_counter() - started)
+
+    def show_hires_detail(self, index):
+        """Czeka (przez after) na dokładną geometrię kraju i podmienia nią podświetlenie"""
+        if self.engine.current_index != index or self.mode_var.get() == MODE_LOCATE:
+            return
+        if not self.hires.is_ready(index):
+            # Geometria wypadła z pamięci LRU albo nie była zlecona - zlecamy ją teraz
+            self.hires.request(index)
+            if not self.hires.is_pending(index) and not self.hires.is_ready(index):
+                return
+        if not self.hires.is_ready(index) or self.animator.running:
+            self.root.after(30, self.show_hires_detail, index)
+            return
+        self.renderer.show_detail(index, self.hires.get(index))
 
-            # Aktualizacja wykresu
-            self.canvas.draw()
-        else:
-            messagebox.showwarning("Ostrzeżenie", "Brak krajów dla wybranego poziomu trudności")
+    def prefetch_next_round(self):
+        if self.mode_var.get() == MODE_LOCATE:
+            return
+        next_index = self.engine.peek_next()
+        if next_index is None:
+            return
+        if self.hires is not None:
+            self.hires.request(next_index)
+        if self.prefetcher is not None and not self._cached_image_exists(next_index):
+            self.prefetcher.request(next_index, self.engine.viewports[next_index], self.fig,
+                                    self.prefetch_generation)
+
+    def _cached_image_exists(self, index):
+        if self.image_cache is None:
+            return False
+        size = (int(self.fig.bbox.width), int(self.fig.bbox.height))
+        return self.image_cache.has(index, size, self.fig.dpi)
 
     def show_world_view(self):
         """Przywraca widok całego świata"""
         if hasattr(self, 'world_bounds'):
-            minx, miny, maxx, maxy = self.world_bounds
-            self.ax.set_xlim(minx, maxx)
-            self.ax.set_ylim(miny, maxy)
-            self.canvas.draw()
+            self.animator.animate(self.world_bounds, lambda: self.renderer.show_world(self.world_bounds))
 
-    def check_answer(self):
-        if not hasattr(self, 'current_country') or self.current_country is None:
-            messagebox.showinfo("Informacja", "Najpierw rozpocznij nową rundę")
+    def on_map_click(self, x, y):
+        """Kliknięcie w mapę (x, y we współrzędnych danych) w trybie "wskaż na mapie" """
+        if (self.mode_var.get() != MODE_LOCATE or self.engine is None or self.round_answered
+                or self.engine.current_index is None):
+            return
+        # W trakcie przejścia współrzędne kliknięcia nie odpowiadają widocznej klatce
+        if self.animator.running:
             return
 
-        user_answer = self.answer_var.get().strip().lower()
+        self.round_answered = True
+        with span("kliknięcie"):
+            result = self.engine.check_location(x, y)
+            country_name = self.engine.display_name(result.country)
+
+            if result.correct:
+                self.feedback_label.config(text=f"Brawo, to {country_name}!", fg="#4CAF50")
+            elif result.kind == OTHER:
+                clicked_name = self.engine.display_name(result.answered_country)
+                self.feedback_label.config(text=f"Niestety, to {clicked_name}. {country_name} zaznaczono na mapie",
+                                           fg="#f44336")
+            else:
+                self.feedback_label.config(text=f"Niestety, to nie ląd. {country_name} zaznaczono na mapie",
+                                           fg="#f44336")
+
+            # Pokazanie właściwego kraju bez zmiany widoku
+            self.renderer.show_country(result.country)
+            self.update_score()
+
+    def update_score(self):
+        self.score_label.config(text=str(self.engine.score))
+        self.accuracy_label.config(text=f"{self.engine.accuracy()}%")
+        if self.engine.progress is not None:
+            attempts, correct = self.engine.progress.totals()
+            if attempts:
+                self.total_label.config(text=f"Łącznie: {correct}/{attempts} ({correct * 100 // attempts}%)")
+
+    def on_answer_key(self, event):
+        """Po każdym klawiszu odkłada szukanie podpowiedzi (szybkie pisanie nie blokuje pętli Tk)"""
+        if event.keysym in NAVIGATION_KEYS:
+            return
+        if self._suggest_job is not None:
+            self.root.after_cancel(self._suggest_job)
+        self._suggest_job = self.root.after(SUGGEST_DELAY_MS, self.update_suggestions)
 
-        if not user_answer:
-            messagebox.showinfo("Informacja", "Wpisz nazwę kraju")
+    def update_suggestions(self):
+        self._suggest_job = None
+        if self.autocomplete is None or self.mode_var.get() != MODE_NAME:
+            return
+        text = self.answer_var.get()
+        with span("podpowiedzi"):
+            suggestions = self.autocomplete.suggest(text)
+        # Nie ma czego podpowiadać, gdy wpisana nazwa jest jedyną pasującą
+        if not suggestions or (len(suggestions) == 1 and suggestions[0].lower() == text.strip().lower()):
+            self.hide_suggestions()
             return
 
-        correct_name = self.current_country['name']
-        alt_names = self.current_country['alt_names']
+        self.suggestion_list.delete(0, tk.END)
+        self.suggestion_list.insert(tk.END, *suggestions)
+        self.suggestion_list.config(height=len(suggestions))
+        self.suggestion_list.place(in_=self.answer_entry, x=0, rely=1.0, relwidth=1.0)
+        self.suggestion_list.lift()
+
+    def hide_suggestions(self):
+        if self._suggest_job is not None:
+            self.root.after_cancel(self._suggest_job)
+            self._suggest_job = None
+        self.suggestion_list.selection_clear(0, tk.END)
+        self.suggestion_list.place_forget()
+
+    def move_suggestion(self, step):
+        """Strzałki przesuwają zaznaczenie na liście podpowiedzi"""
+        if not self.suggestion_list.winfo_ismapped():
+            return "break"
+        count = self.suggestion_list.size()
+        selection = self.suggestion_list.curselection()
+        position = (selection[0] + step) % count if selection else (0 if step > 0 else count - 1)
+        self.suggestion_list.selection_clear(0, tk.END)
+        self.suggestion_list.selection_set(position)
+        self.suggestion_list.see(position)
+        return "break"
+
+    def accept_suggestion(self, event=None):
+        """Wpisuje zaznaczoną (albo pierwszą) podpowiedź do pola odpowiedzi"""
+        if not self.suggestion_list.winfo_ismapped():
+            return None
+        selection = self.suggestion_list.curselection()
+        self.answer_var.set(self.suggestion_list.get(selection[0] if selection else 0))
+        self.answer_entry.icursor(tk.END)
+        self.answer_entry.focus_set()
+        self.hide_suggestions()
+        # Tab nie przenosi fokusu dalej, gdy wybrał podpowiedź
+        return "break"
+
+    def on_answer_return(self, event=None):
+        # Enter na zaznaczonej podpowiedzi najpierw ją wpisuje
+        if self.suggestion_list.winfo_ismapped() and self.suggestion_list.curselection():
+            self.accept_suggestion()
+        self.hide_suggestions()
+        self.check_answer()
+
+    def check_answer(self, choice=None):
+        """Sprawdza wpisaną nazwę albo (tryb "wybór z listy") kraj `choice` wybrany przyciskiem"""
+        if self.mode_var.get() == MODE_LOCATE:
+            return
 
-        self.attempts += 1
+        if self.engine is None or self.engine.current_index is None:
+            messagebox.showinfo("Informacja", "Najpierw rozpocznij nową rundę")
+            return
 
-        if user_answer in alt_names:
-            self.score += 1
-            self.feedback_label.config(text="Poprawna odpowiedź!", fg="#4CAF50")
+        if self.mode_var.get() == MODE_CHOICE:
+            # Jedna odpowiedź na rundę - przycisk "Sprawdź" nic tu nie robi
+            if choice is None or self.round_answered:
+                return
+            self.round_answered = True
+            for button in self.choice_buttons:
+                button.state(["disabled"])
         else:
-            # Próbuj znaleźć polską nazwę kraju
-            polish_name = ""
-            for name in alt_names:
-                if name not in [correct_name.lower()]:
-                    polish_name = name
-                    break
-
-            if polish_name:
-                self.feedback_label.config(text=f"Niestety, to jest {polish_name.capitalize()}", fg="#f44336")
+            user_answer = self.answer_var.get().strip().lower()
+
+            if not user_answer:
+                messagebox.showinfo("Informacja", "Wpisz nazwę kraju")
+                return
+
+        with span("odpowiedź"):
+            if choice is not None:
+                result = self.engine.check_choice(choice)
+            else:
+                # Odpowiedź rozpoznawana przez indeks: bez polskich znaków i z tolerancją literówek
+                result = self.engine.check_answer(user_answer)
+            country_name = self.engine.display_name(result.country)
+
+            if result.kind == EXACT:
+                self.feedback_label.config(text="Poprawna odpowiedź!", fg="#4CAF50")
+            elif result.kind == TYPO:
+                self.feedback_label.config(text=f"Poprawna odpowiedź! (pisownia: {country_name})", fg="#4CAF50")
+            elif result.kind == OTHER:
+                other_name = self.engine.display_name(result.answered_country)
+                self.feedback_label.config(text=f"Niestety, to nie {other_name}, to jest {country_name}",
+                                           fg="#f44336")
             else:
-                self.feedback_label.config(text=f"Niestety, to jest {correct_name}", fg="#f44336")
+                self.feedback_label.config(text=f"Niestety, to jest {country_name}", fg="#f44336")
+
+            # Aktualizacja punktacji
+            self.update_score()
+
+
+def save_perf_report(options, startup_timer, profiler=None):
+    """Zapisuje raport wydajności (i profil cProfile) po zamknięciu okna."""
+    path = options.perf_report or ("kck_perf.json" if profiler is not None else None)
+    if path is None:
+        return
+    write_report(path, build_report(startup_timer, profiler))
+    print(f"Raport wydajności: {path}")
+    if profiler is not None:
+        profile_path = os.path.splitext(path)[0] + ".prof"
+        profiler.dump(profile_path)
+        print(f"Profil cProfile: {profile_path}")
 
-        # Aktualizacja punktacji
-        self.score_label.config(text=str(self.score))
-        accuracy = int((self.score / self.attempts) * 100) if self.attempts > 0 else 0
-        self.accuracy_label.config(text=f"{accuracy}%")
 
 # Uruchomienie aplikacji
 if __name__ == "__main__":
+    startup_timer = PhaseTimer()
+    options = parse_args()
+    profiler = Profiler() if options.profile else None
+    if profiler is not None:
+        profiler.start()
     root = tk.Tk()
-    app = GeographyApp(root)
+    app = GeographyApp(root, startup_timer, options)
     root.mainloop()
+    # Dopisanie do bazy odpowiedzi czekających w kolejce zapisu
+    if app.engine is not None and app.engine.progress is not None:
+        app.engine.progress.close()
+    if profiler is not None:
+        profiler.stop()
+    save_perf_report(options, startup_timer, profiler)
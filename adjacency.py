@@ -0,0 +1,134 @@
+"""Graf sąsiedztwa krajów do trybu "wybór z listy".
+
+Błędne odpowiedzi w pytaniu wielokrotnego wyboru to prawdziwi sąsiedzi
+pokazanego kraju (Polska, Czechy, Słowacja), a nie losowe państwa. Sąsiadów
+wyznacza drzewo STRtree zapytaniem "dwithin" z małą tolerancją (granice
+w warstwie 110m nie zawsze się pokrywają). Wyspy i kraje z małą liczbą
+sąsiadów uzupełniamy najbliższymi krajami w coraz większym promieniu.
+
+Graf jest liczony raz i zapisywany obok pamięci podręcznej geometrii
+(geo_cache) - przy kolejnych uruchomieniach to tylko odczyt JSON-a, a wybór
+odpowiedzi w rundzie to odczyt listy.
+"""
+import json
+import os
+
+import numpy as np
+import shapely
+
+import geo_cache
+
+# Zwiększ przy każdej zmianie sposobu liczenia grafu
+FORMAT_VERSION = 1
+
+# Kraje odległe o mniej niż tyle (stopni) uznajemy za sąsiadów
+NEIGHBOUR_DISTANCE = 0.05
+# Ilu najbliższych krajów szukamy dla każdego kraju (zapas dla krajów bez sąsiadów)
+NEARBY_COUNT = 6
+# Kolejne promienie (w stopniach) szukania najbliższych krajów
+SEARCH_RADII = (2.0, 5.0, 15.0, 45.0, 180.0)
+
+
+class AdjacencyGraph:
+    """Sąsiedzi i najbliższe kraje dla każdej pozycji world_data."""
+
+    def __init__(self, neighbours, nearby):
+        self.neighbours = neighbours
+        self.nearby = nearby
+
+    @classmethod
+    def from_world_data(cls, world_data):
+        geometries = np.asarray(world_data.geometry.values)
+        count = len(geometries)
+        empty = shapely.is_missing(geometries) | shapely.is_empty(geometries)
+        tree = shapely.STRtree(np.where(empty, None, geometries))
+
+        left, right = tree.query(geometries, predicate='dwithin', distance=NEIGHBOUR_DISTANCE)
+        keep = left != right
+        neighbours = [[] for _ in range(count)]
+        for country, other in zip(left[keep].tolist(), right[keep].tolist()):
+            neighbours[country].append(other)
+
+        # Najbliższe kraje: zapytania w coraz większym promieniu tylko dla krajów,
+        # którym wciąż brakuje kandydatów, posortowane według rzeczywistej odległości
+        nearby = [[] for _ in range(count)]
+        pending = np.flatnonzero(~empty)
+        for radius in SEARCH_RADII:
+            if len(pending) == 0:
+                break
+            query_index, other = tree.query(geometries[pending], predicate='dwithin', distance=radius)
+            country = pending[query_index]
+            keep = country != other
+            country, other = country[keep], other[keep]
+            distance = shapely.distance(geometries[country], geometries[other])
+            order = np.lexsort((other, distance, country))
+            for position in pending:
+                nearby[position] = []
+            for position, candidate in zip(country[order].tolist(), other[order].tolist()):
+                if len(nearby[position]) < NEARBY_COUNT:
+                    nearby[position].append(candidate)
+            pending = np.array([position for position in pending if len(nearby[position]) < NEARBY_COUNT],
+                               dtype=np.intp)
+        return cls(neighbours, nearby)
+
+    def distractors(self, index, count, rng):
+        """`count` krajów do pomylenia z krajem `index`: losowo z sąsiadów, potem najbliższe."""
+        neighbours = self.neighbours[index]
+        if len(neighbours) >= count:
+            return rng.sample(neighbours, count)
+        chosen = list(neighbours)
+        for other in self.nearby[index]:
+            if len(chosen) >= count:
+                break
+            if other not in chosen:
+                chosen.append(other)
+        return chosen
+
+
+def cache_path_for(shapefile_path):
+    """Plik grafu obok katalogu pamięci podręcznej geometrii."""
+    return geo_cache.cache_dir_for(shapefile_path) + "-adjacency.json"
+
+
+def load(shapefile_path, names):
+    """Graf z pliku albo None, jeśli go brak lub nie pasuje do danych."""
+    try:
+        with open(cache_path_for(shapefile_path), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (data.get("version") != FORMAT_VERSION or data.get("names") != names
+            or data.get("distance") != NEIGHBOUR_DISTANCE or not geo_cache.matches_source(shapefile_path, data)):
+        return None
+    return AdjacencyGraph(data["neighbours"], data["nearby"])
+
+
+def save(shapefile_path, names, graph):
+    path = cache_path_for(shapefile_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": FORMAT_VERSION,
+            **geo_cache.source_fingerprint(shapefile_path),
+            "distance": NEIGHBOUR_DISTANCE,
+            "names": names,
+            "neighbours": graph.neighbours,
+            "nearby": graph.nearby,
+        }, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_adjacency(shapefile_path, world_data):
+    """Graf sąsiedztwa z pamięci podręcznej, a przy jej braku liczony i zapisywany."""
+    names = [str(name) for name in world_data['name']]
+    graph = load(shapefile_path, names)
+    if graph is not None:
+        return graph
+    graph = AdjacencyGraph.from_world_data(world_data)
+    try:
+        save(shapefile_path, names, graph)
+    except OSError as e:
+        # Brak zapisu nie może blokować gry - graf policzymy przy następnym starcie
+        print(f"Nie udało się zapisać grafu sąsiedztwa: {e}")
+    return graph
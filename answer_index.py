@@ -0,0 +1,145 @@
+"""Indeks odpowiedzi: znormalizowane nazwy krajów i wyszukiwanie z tolerancją literówek.
+
+Klucze są normalizowane (bez polskich znaków, wielkości liter, interpunkcji
+i nadmiarowych spacji), więc "Bułgaria", "bulgaria" i "BUŁGARIA " trafiają
+w ten sam kraj. Dokładne trafienia to jeden odczyt ze słownika, a literówki
+są szukane w indeksie trigramów: kandydaci muszą mieć dość wspólnych
+trigramów z odpowiedzią, a dopiero ich sprawdza się odległością Levenshteina.
+"""
+import re
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+
+# Rodzaje wyniku sprawdzenia odpowiedzi
+EXACT = "exact"      # dokładnie ten kraj
+TYPO = "typo"        # literówka w nazwie właściwego kraju
+OTHER = "other"      # nazwa (lub literówka) innego, istniejącego kraju
+UNKNOWN = "unknown"  # nic podobnego w indeksie
+
+Match = namedtuple("Match", ["kind", "country", "key", "distance"])
+
+# Litery, których NFKD nie rozkłada na literę bazową i znak diakrytyczny
+_SPECIAL_LETTERS = str.maketrans({'ł': 'l', 'ø': 'o', 'đ': 'd', 'ß': 'ss', 'æ': 'ae', 'œ': 'oe'})
+_NON_ALNUM = re.compile(r"[\W_]+")
+
+
+def normalize(text):
+    """Sprowadza nazwę do postaci kluczowej: małe litery ASCII i pojedyncze spacje."""
+    text = text.lower().translate(_SPECIAL_LETTERS)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def max_typos(key):
+    """Ile literówek tolerujemy - krótkie nazwy muszą być wpisane dokładnie."""
+    if len(key) <= 4:
+        return 0
+    if len(key) <= 8:
+        return 1
+    return 2
+
+
+def levenshtein(a, b, max_distance=None):
+    """Odległość edycyjna; przy max_distance przerywa, gdy wynik na pewno go przekroczy."""
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def trigrams(key):
+    padded = f"$${key}$$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class TrigramIndex:
+    """Indeks odwrócony trigram -> klucze, do szybkiego wyszukiwania z literówkami."""
+
+    def __init__(self, keys=()):
+        self.keys_by_trigram = defaultdict(list)
+        for key in keys:
+            for trigram, count in Counter(trigrams(key)).items():
+                self.keys_by_trigram[trigram].append((key, count))
+
+    def search(self, key, max_distance):
+        """Zwraca listę (odległość, klucz) dla kluczy w odległości <= max_distance."""
+        query = Counter(trigrams(key))
+        shared = Counter()
+        for trigram, count in query.items():
+            for candidate, candidate_count in self.keys_by_trigram.get(trigram, ()):
+                shared[candidate] += min(count, candidate_count)
+
+        # Jedna edycja psuje najwyżej 3 trigramy, więc klucz w odległości k
+        # musi dzielić z odpowiedzią co najmniej |trigramy| - 3k trigramów
+        min_shared = sum(query.values()) - 3 * max_distance
+        found = []
+        for candidate, count in shared.items():
+            if count >= min_shared:
+                distance = levenshtein(key, candidate, max_distance)
+                if distance <= max_distance:
+                    found.append((distance, candidate))
+        found.sort()
+        return found
+
+
+class AnswerIndex:
+    """Odwzorowanie odpowiedzi gracza na numer kraju (pozycję wiersza w world_data)."""
+
+    def __init__(self, alias_lists):
+        self.countries_by_key = {}
+        for country, aliases in enumerate(alias_lists):
+            for alias in aliases:
+                key = normalize(alias)
+                if key:
+                    self.countries_by_key.setdefault(key, country)
+        self.trigrams = TrigramIndex(self.countries_by_key)
+
+    @classmethod
+    def from_world_data(cls, world_data):
+        return cls(world_data['alt_names'])
+
+    def resolve(self, answer):
+        """Najbliższy kraj dla odpowiedzi: Match z kind EXACT, TYPO lub UNKNOWN."""
+        key = normalize(answer)
+        country = self.countries_by_key.get(key)
+        if country is not None:
+            return Match(EXACT, country, key, 0)
+
+        found = self.trigrams.search(key, max_typos(key)) if key else []
+        if not found:
+            return Match(UNKNOWN, None, key, None)
+        distance, best_key = found[0]
+        return Match(TYPO, self.countries_by_key[best_key], best_key, distance)
+
+    def check(self, answer, target):
+        """Porównuje odpowiedź z krajem `target`, odróżniając literówkę od innego kraju."""
+        key = normalize(answer)
+        country = self.countries_by_key.get(key)
+        if country is not None:
+            return Match(EXACT if country == target else OTHER, country, key, 0)
+
+        found = self.trigrams.search(key, max_typos(key)) if key else []
+        target_hits = [(d, k) for d, k in found if self.countries_by_key[k] == target]
+        other_hits = [(d, k) for d, k in found if self.countries_by_key[k] != target]
+
+        # Literówkę uznajemy tylko wtedy, gdy właściwy kraj jest wyraźnie najbliżej
+        # ("kostarika" to Kostaryka, ale odpowiedź równie bliska innemu krajowi
+        # jest niejednoznaczna i liczy się jako błąd)
+        if target_hits and (not other_hits or target_hits[0][0] < other_hits[0][0]):
+            distance, best_key = target_hits[0]
+            return Match(TYPO, target, best_key, distance)
+        if other_hits:
+            distance, best_key = other_hits[0]
+            return Match(OTHER, self.countries_by_key[best_key], best_key, distance)
+        return Match(UNKNOWN, None, key, None)
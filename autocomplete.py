@@ -0,0 +1,58 @@
+"""Podpowiedzi nazw krajów w trakcie pisania odpowiedzi.
+
+Nazwy są normalizowane tak samo jak w answer_index (bez polskich znaków,
+małymi literami), sortowane raz po załadowaniu danych, a podpowiedzi dla
+wpisanego początku to przedział posortowanej tablicy wyznaczony przez bisect.
+Osobna tablica zawiera nazwy od początku kolejnych słów, więc "hercegowina"
+podpowie "Bośnia i Hercegowina" - ale dopiero po nazwach zaczynających się
+od wpisanego tekstu.
+"""
+import bisect
+
+from answer_index import normalize
+
+MAX_SUGGESTIONS = 8
+
+
+class Autocomplete:
+    def __init__(self, alias_lists):
+        names = []
+        words = []
+        for aliases in alias_lists:
+            for alias in aliases:
+                key = normalize(alias)
+                if not key:
+                    continue
+                # Nazwy wyświetlane w pakietach mają już właściwą pisownię
+                display = alias if alias != alias.lower() else alias.capitalize()
+                names.append((key, display))
+                parts = key.split(" ")
+                for start in range(1, len(parts)):
+                    words.append((" ".join(parts[start:]), display))
+        names.sort()
+        words.sort()
+        # Klucze i nazwy w osobnych listach - bisect porównuje same napisy
+        self._names = ([key for key, _ in names], [display for _, display in names])
+        self._words = ([key for key, _ in words], [display for _, display in words])
+
+    @classmethod
+    def from_world_data(cls, world_data):
+        # Ostatnia nazwa alternatywna to oryginalna (angielska) - podpowiadamy polskie,
+        # chyba że kraj innych nie ma
+        return cls(aliases[:-1] or aliases for aliases in world_data['alt_names'])
+
+    def suggest(self, text, limit=MAX_SUGGESTIONS):
+        """Do `limit` nazw pasujących do wpisanego początku (najpierw całe nazwy, potem słowa)."""
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        found = []
+        for keys, displays in (self._names, self._words):
+            position = bisect.bisect_left(keys, prefix)
+            while position < len(keys) and keys[position].startswith(prefix):
+                if displays[position] not in found:
+                    found.append(displays[position])
+                    if len(found) >= limit:
+                        return found
+                position += 1
+        return found
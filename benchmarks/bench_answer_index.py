@@ -0,0 +1,103 @@
+"""Mikrobenchmark indeksu odpowiedzi (answer_index).
+
+Generuje kilka tysięcy odpowiedzi (dokładne nazwy, warianty bez polskich
+znaków, literówki, nazwy innych krajów i śmieci) i mierzy czas
+rozpoznawania pojedynczej odpowiedzi.
+
+Uruchomienie z katalogu głównego projektu:
+    python benchmarks/bench_answer_index.py --answers 5000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geo_data  # noqa: E402
+from answer_index import AnswerIndex  # noqa: E402
+
+
+def mutate(text, rng, edits):
+    """Wprowadza `edits` losowych literówek (zamiana, wstawienie, usunięcie litery)."""
+    letters = string.ascii_lowercase + "ąćęłńóśźż"
+    for _ in range(edits):
+        if not text:
+            break
+        pos = rng.randrange(len(text))
+        operation = rng.choice(("replace", "insert", "delete"))
+        if operation == "replace":
+            text = text[:pos] + rng.choice(letters) + text[pos + 1:]
+        elif operation == "insert":
+            text = text[:pos] + rng.choice(letters) + text[pos:]
+        else:
+            text = text[:pos] + text[pos + 1:]
+    return text
+
+
+def generate_answers(alias_lists, count, rng):
+    answers = []
+    for _ in range(count):
+        target = rng.randrange(len(alias_lists))
+        alias = rng.choice(alias_lists[target])
+        variant = rng.random()
+        if variant < 0.3:
+            answer = alias
+        elif variant < 0.45:
+            answer = alias.upper() + "  "
+        elif variant < 0.75:
+            answer = mutate(alias, rng, rng.choice((1, 2)))
+        elif variant < 0.9:
+            answer = rng.choice(alias_lists[rng.randrange(len(alias_lists))])
+        else:
+            answer = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 15)))
+        answers.append((answer, target))
+    return answers
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=5000, help="liczba odpowiedzi")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    shapefile_path = geo_data.find_shapefile()
+    if shapefile_path is None:
+        sys.exit("Nie znaleziono pliku z danymi geograficznymi")
+    world_data = geo_data.load_world_data(shapefile_path)
+    alias_lists = list(world_data['alt_names'])
+
+    start = time.perf_counter()
+    index = AnswerIndex(alias_lists)
+    build_time = time.perf_counter() - start
+
+    rng = random.Random(args.seed)
+    answers = generate_answers(alias_lists, args.answers, rng)
+
+    timings = []
+    kinds = Counter()
+    for answer, target in answers:
+        start = time.perf_counter()
+        match = index.check(answer, target)
+        timings.append(time.perf_counter() - start)
+        kinds[match.kind] += 1
+
+    timings.sort()
+    print(f"Kluczy w indeksie: {len(index.countries_by_key)}, budowa: {build_time * 1000:.1f} ms")
+    print(f"Odpowiedzi: {len(answers)}, łącznie {sum(timings) * 1000:.1f} ms")
+    print(f"Na odpowiedź: średnio {sum(timings) / len(timings) * 1e6:.1f} µs, "
+          f"p50 {percentile(timings, 0.5) * 1e6:.1f} µs, "
+          f"p99 {percentile(timings, 0.99) * 1e6:.1f} µs, "
+          f"max {timings[-1] * 1e6:.1f} µs")
+    print("Wyniki: " + ", ".join(f"{kind}={count}" for kind, count in sorted(kinds.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark testu trafienia (tryb "wskaż na mapie").
+
+Klika w gęstą siatkę punktów pokrywającą cały świat i mierzy czas
+pojedynczego wyszukiwania kraju (CountryLocator.locate) oraz wersji
+wsadowej (locate_many).
+
+Uruchomienie z katalogu głównego projektu:
+    python benchmarks/bench_hit_test.py --grid 400x200
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geo_data  # noqa: E402
+from hit_test import CountryLocator  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grid", default="400x200", help="rozmiar siatki kliknięć, np. 400x200")
+    parser.add_argument("--shapefile", help="plik shapefile (domyślnie ten sam co w grze)")
+    args = parser.parse_args()
+    columns, rows = (int(n) for n in args.grid.lower().split("x"))
+
+    shapefile_path = args.shapefile or geo_data.find_shapefile()
+    if shapefile_path is None:
+        sys.exit("Nie znaleziono pliku z danymi geograficznymi")
+    world_data = geo_data.load_world_data(shapefile_path)
+
+    start = time.perf_counter()
+    locator = CountryLocator(world_data.geometry.values)
+    build_time = time.perf_counter() - start
+
+    minx, miny, maxx, maxy = world_data.total_bounds
+    xs, ys = np.meshgrid(np.linspace(minx, maxx, columns), np.linspace(miny, maxy, rows))
+    xs, ys = xs.ravel(), ys.ravel()
+
+    timings = np.empty(len(xs))
+    hits = 0
+    for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+        start = time.perf_counter()
+        country = locator.locate(x, y)
+        timings[i] = time.perf_counter() - start
+        hits += country is not None
+
+    start = time.perf_counter()
+    bulk = locator.locate_many(xs, ys)
+    bulk_time = time.perf_counter() - start
+
+    print(f"Kraje: {len(world_data)}, budowa indeksu: {build_time * 1000:.1f} ms")
+    print(f"Kliknięcia: {len(xs)} ({hits} w ląd)")
+    print(f"Pojedynczo: średnio {timings.mean() * 1e6:.1f} µs, "
+          f"p50 {np.percentile(timings, 50) * 1e6:.1f} µs, "
+          f"p99 {np.percentile(timings, 99) * 1e6:.1f} µs")
+    print(f"Wsadowo: {bulk_time * 1000:.1f} ms ({bulk_time / len(xs) * 1e6:.2f} µs na punkt), "
+          f"zgodność z pojedynczymi: {int((bulk >= 0).sum()) == hits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Sprawdzenie widoków krajów z terytoriami zamorskimi (viewports).
+
+Widok ma kadrować główne skupisko poligonów: USA bez Alaski i Hawajów,
+Francję bez Gujany Francuskiej i wysp, Norwegię bez Svalbardu. Kończy się
+kodem 1, jeśli któryś kraj wychodzi poza prostokąt swojego lądu.
+
+Uruchomienie z katalogu głównego projektu:
+    python benchmarks/check_viewports.py
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geo_data  # noqa: E402
+import viewports  # noqa: E402
+
+# Nazwy kraju (jak w kolumnie NAME różnych wydań Natural Earth) i prostokąt
+# (minx, miny, maxx, maxy), w którym musi się zmieścić jego skupisko
+MAINLAND = (
+    (("United States of America", "United States"), (-125.0, 24.0, -66.0, 50.0)),
+    (("France",), (-5.5, 41.0, 10.0, 51.5)),
+    (("Norway",), (4.5, 57.5, 31.5, 71.5)),
+)
+
+
+def check(world_data):
+    """Lista opisów błędów (pusta, gdy wszystkie widoki są dobre)."""
+    names = list(world_data['name'])
+    views = viewports.build_viewport_index(world_data)
+    geographic = viewports.is_geographic(world_data)
+    errors = []
+    for candidates, (minx, miny, maxx, maxy) in MAINLAND:
+        name = next((name for name in candidates if name in names), None)
+        if name is None:
+            errors.append(f"{candidates[0]}: brak w danych")
+            continue
+        index = names.index(name)
+        bounds = viewports.cluster_bounds(world_data.geometry.values[index], geographic)
+        if not (bounds[0] >= minx and bounds[1] >= miny and bounds[2] <= maxx and bounds[3] <= maxy):
+            errors.append(f"{name}: skupisko {np.round(bounds, 1).tolist()} wychodzi poza ląd "
+                          f"{[minx, miny, maxx, maxy]}")
+        # Środek widoku to środek lądu, nie środek całego terytorium
+        center_x = (views[index][0] + views[index][2]) / 2
+        center_y = (views[index][1] + views[index][3]) / 2
+        if not (minx <= center_x <= maxx and miny <= center_y <= maxy):
+            errors.append(f"{name}: środek widoku ({center_x:.1f}, {center_y:.1f}) poza lądem")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapefile", help="plik shapefile (domyślnie ten sam co w grze)")
+    args = parser.parse_args()
+
+    shapefile_path = args.shapefile or geo_data.find_shapefile()
+    if shapefile_path is None:
+        sys.exit("Nie znaleziono pliku z danymi geograficznymi")
+    errors = check(geo_data.load_world_data(shapefile_path))
+    for error in errors:
+        print(error)
+    if errors:
+        sys.exit(1)
+    print("Widoki krajów z terytoriami zamorskimi: OK")
+
+
+if __name__ == "__main__":
+    main()
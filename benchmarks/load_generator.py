@@ -0,0 +1,156 @@
+"""Generator obciążenia serwera quizu (quiz_server.py).
+
+Każdy wirtualny gracz ma własne połączenie HTTP/1.1 (keep-alive) i rozgrywa
+kolejne rundy: nowa runda, pobranie obrazu, odpowiedź. Na końcu wypisuje
+p50/p99 opóźnień dla każdego rodzaju zapytania i liczbę zapytań na sekundę.
+
+Uruchomienie z katalogu głównego projektu (serwer startuje w tle):
+    python benchmarks/load_generator.py --start-server --players 300 --rounds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Odpowiedzi wirtualnych graczy - wśród nich poprawne, błędne i bzdury
+ANSWERS = ("Polska", "Niemcy", "Francja", "Brazylia", "Chiny", "Kanada", "Egipt", "Australia",
+           "Hiszpania", "Indie", "Japonia", "Meksyk", "Kenia", "Norwegia", "Argentyna", "xyz")
+
+
+class Connection:
+    """Minimalny klient HTTP/1.1 z utrzymywanym połączeniem."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, data=None):
+        body = json.dumps(data).encode() if data is not None else b""
+        self.writer.write((f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                           f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+        length = 0
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        payload = await self.reader.readexactly(length)
+        return int(status_line.split(" ", 2)[1]), payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def play(host, port, rounds, difficulty, rng, timings, errors):
+    connection = Connection(host, port)
+    await connection.open()
+
+    async def timed(kind, method, path, data=None):
+        start = time.perf_counter()
+        status, payload = await connection.request(method, path, data)
+        timings[kind].append(time.perf_counter() - start)
+        if status != 200:
+            errors[kind] += 1
+        return payload
+
+    try:
+        session = json.loads(await timed("session", "POST", "/api/session", {"difficulty": difficulty}))
+        session_path = f"/api/session/{session['session']}"
+        for _ in range(rounds):
+            round_info = json.loads(await timed("round", "POST", f"{session_path}/round"))
+            await timed("image", "GET", round_info["image"])
+            await timed("answer", "POST", f"{session_path}/answer", {"answer": rng.choice(ANSWERS)})
+    finally:
+        connection.close()
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+    difficulties = args.difficulties.split(",")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        play(args.host, args.port, args.rounds, difficulties[i % len(difficulties)],
+             random.Random(rng.random()), timings, errors)
+        for i in range(args.players)))
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(values) for values in timings.values())
+    print(f"Gracze: {args.players}, rundy na gracza: {args.rounds}")
+    print(f"Zapytania: {total} w {elapsed:.2f} s -> {total / elapsed:.0f} zapytań/s")
+    for kind in ("session", "round", "image", "answer"):
+        values = np.array(timings[kind]) * 1000
+        if len(values):
+            print(f"  {kind:<8} n={len(values):<6} p50 {np.percentile(values, 50):7.2f} ms   "
+                  f"p99 {np.percentile(values, 99):7.2f} ms   błędy: {errors[kind]}")
+    all_values = np.concatenate([np.array(values) for values in timings.values()]) * 1000
+    print(f"  {'razem':<8} n={len(all_values):<6} p50 {np.percentile(all_values, 50):7.2f} ms   "
+          f"p99 {np.percentile(all_values, 99):7.2f} ms")
+
+    connection = Connection(args.host, args.port)
+    await connection.open()
+    _, payload = await connection.request("GET", "/api/stats")
+    connection.close()
+    print(f"Serwer: {json.loads(payload)}")
+
+
+def start_server(args):
+    command = [sys.executable, os.path.join(ROOT, "quiz_server.py"), "--host", args.host,
+               "--port", str(args.port)] + args.server_args
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    # Czekamy, aż serwer wczyta dane i zacznie przyjmować połączenia
+    for line in server.stdout:
+        print(f"[serwer] {line.rstrip()}")
+        if line.startswith("Serwer quizu"):
+            return server
+    sys.exit("Serwer nie wystartował")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--players", type=int, default=200, help="liczba równoczesnych graczy")
+    parser.add_argument("--rounds", type=int, default=10, help="rundy na gracza")
+    parser.add_argument("--difficulties", default="world,europe,asia,africa,americas,oceania")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-server", action="store_true",
+                        help="uruchom quiz_server.py na czas pomiaru")
+    parser.add_argument("server_args", nargs=argparse.REMAINDER,
+                        help="dodatkowe argumenty dla serwera (po --)")
+    args = parser.parse_args()
+    if args.server_args[:1] == ["--"]:
+        args.server_args = args.server_args[1:]
+
+    server = start_server(args) if args.start_server else None
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            server.stdout.close()
+
+
+if __name__ == "__main__":
+    main()
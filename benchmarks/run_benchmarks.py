@@ -0,0 +1,355 @@
+"""Zestaw benchmarków bez ekranu (backend Agg) z porównaniem do wyniku bazowego.
+
+Mierzy ładowanie danych (jak load_geography_data: odczyt, tabela widoków,
+indeks odpowiedzi, indeks przestrzenny), get_filtered_countries, rundę
+(start_new_round: losowanie i rysowanie), widok całego świata
+(show_world_view), klatkę animowanego przejścia między widokami
+(zoom.ZoomAnimator) i sprawdzanie odpowiedzi (check_answer) na danych 110m
+oraz na syntetycznych światach z 1k, 10k i 100k poligonów.
+
+Wyniki można zapisać jako plik bazowy i porównywać z nim kolejne pomiary -
+regresja czasu rundy lub startu kończy program kodem 1.
+
+Uruchomienie z katalogu głównego projektu:
+    python benchmarks/run_benchmarks.py --save benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --datasets 110m,1k --rounds 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+import shapely  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import geo_data  # noqa: E402
+import perf  # noqa: E402
+import viewports  # noqa: E402
+from answer_index import AnswerIndex  # noqa: E402
+from hit_test import CountryLocator  # noqa: E402
+from quiz_engine import DIFFICULTIES, QuizEngine, synthetic_answer  # noqa: E402
+
+SYNTHETIC_SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+CONTINENTS = ("Europe", "Asia", "Africa", "North America", "South America", "Oceania")
+
+# Metryki, których wzrost uznajemy za regresję (mediana czasu)
+REGRESSION_METRICS = ("load.total", "load_cold.total", "round", "round_lod", "world_view", "transition_frame",
+                      "check_answer")
+
+# Klatki mierzone w jednym przejściu (350 ms przy ~60 kl./s)
+TRANSITION_FRAMES = 20
+
+
+def synthetic_world(count, seed=0, vertices=24):
+    """GeoDataFrame z `count` krajami-wielokątami rozłożonymi na siatce po całym świecie.
+
+    Co piąty kraj ma dodatkową wyspę (MultiPolygon), jak Francja czy Norwegia.
+    """
+    import geopandas as gpd
+
+    rng = np.random.default_rng(seed)
+    columns = int(np.ceil(np.sqrt(count * 2)))
+    rows = int(np.ceil(count / columns))
+    cell_x, cell_y = 360 / columns, 170 / rows
+    cells = np.arange(count)
+    center_x = -180 + (cells % columns + 0.5) * cell_x
+    center_y = -85 + (cells // columns + 0.5) * cell_y
+
+    # Wielokąt gwiaździsty: wierzchołki na okręgu z losowym promieniem
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    radius = rng.uniform(0.25, 0.45, (count, vertices))
+    ring = np.empty((count, vertices + 1, 2))
+    ring[:, :-1, 0] = center_x[:, None] + np.cos(angles) * radius * cell_x
+    ring[:, :-1, 1] = center_y[:, None] + np.sin(angles) * radius * cell_y
+    ring[:, -1] = ring[:, 0]
+    mainland = shapely.polygons(ring)
+
+    with_island = cells[cells % 5 == 0]
+    island = shapely.buffer(shapely.points(center_x[with_island] + 0.45 * cell_x,
+                                           center_y[with_island] + 0.45 * cell_y),
+                            0.04 * min(cell_x, cell_y), quad_segs=4)
+    geometry = mainland.copy()
+    parts = np.empty(2 * len(with_island), dtype=object)
+    parts[0::2], parts[1::2] = mainland[with_island], island
+    geometry[with_island] = shapely.multipolygons(parts, indices=np.repeat(np.arange(len(with_island)), 2))
+
+    return gpd.GeoDataFrame({
+        "NAME": [f"Kraj {i:06d}" for i in cells],
+        "CONTINENT": [CONTINENTS[i] for i in rng.integers(0, len(CONTINENTS), count)],
+    }, geometry=geometry, crs="EPSG:4326")
+
+
+def summarize(durations):
+    values = np.asarray(durations) * 1000
+    return {
+        "n": len(values),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p99_ms": float(np.percentile(values, 99)),
+    }
+
+
+def repeat(function, count, max_seconds):
+    """Czasy kolejnych wywołań funkcji (najwyżej `count` albo do wyczerpania czasu)."""
+    durations = []
+    deadline = time.perf_counter() + max_seconds
+    for _ in range(count):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            break
+    return durations
+
+
+def bench_load(shapefile_path):
+    """Ładowanie jak w load_geography_data: zimny start (shapefile) i ciepły (pamięć podręczna)."""
+    import geo_cache
+    results = {}
+    for label in ("cold", "warm"):
+        if label == "cold":
+            shutil.rmtree(geo_cache.cache_dir_for(shapefile_path), ignore_errors=True)
+        stages = {}
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            world_data = geo_data.load_world_data(shapefile_path)
+        stages["read"] = time.perf_counter() - start
+
+        begin = time.perf_counter()
+        viewport_index = viewports.build_viewport_index(world_data)
+        stages["viewports"] = time.perf_counter() - begin
+        begin = time.perf_counter()
+        answer_index = AnswerIndex.from_world_data(world_data)
+        stages["answer_index"] = time.perf_counter() - begin
+        begin = time.perf_counter()
+        locator = CountryLocator(world_data.geometry.values)
+        stages["locator"] = time.perf_counter() - begin
+        stages["total"] = time.perf_counter() - start
+        results[label] = {name: duration * 1000 for name, duration in stages.items()}
+
+    engine = QuizEngine(world_data, viewport_index, answer_index, rng=random.Random(0), locator=locator)
+    return results, engine
+
+
+def make_renderer(world_data, lod):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from map_renderer import MapRenderer
+
+    # Ten sam rozmiar co w oknie gry
+    fig = Figure(figsize=(10, 6), dpi=100)
+    ax = fig.add_subplot()
+    renderer = MapRenderer(fig, ax, FigureCanvasAgg(fig), lod=lod)
+    start = time.perf_counter()
+    renderer.set_world(world_data)
+    return renderer, time.perf_counter() - start
+
+
+def bench_dataset(shapefile_path, rounds, max_seconds, answers):
+    perf.spans.clear()
+    results = {}
+    load, engine = bench_load(shapefile_path)
+    results["load"] = load["warm"]
+    results["load_cold"] = load["cold"]
+    world_data = engine.world_data
+    results["countries"] = len(world_data)
+
+    def filtered():
+        for difficulty in DIFFICULTIES:
+            engine.set_difficulty(difficulty)
+            engine.get_filtered_countries()
+    results["get_filtered_countries"] = summarize(repeat(filtered, 50, max_seconds))
+    engine.set_difficulty("world")
+
+    for key, lod in (("round", False), ("round_lod", True)):
+        renderer, build_time = make_renderer(world_data, lod)
+        results[f"{key}_build_ms"] = build_time * 1000
+
+        def new_round():
+            index = engine.start_round()
+            renderer.show_country(index, engine.current_view())
+        results[key] = summarize(repeat(new_round, rounds, max_seconds))
+
+    # Widok świata na przemian z rundami, żeby nie mierzyć samych trafień w pamięć teł
+    renderer, _ = make_renderer(world_data, lod=False)
+    world_bounds = world_data.total_bounds
+    durations = []
+    deadline = time.perf_counter() + max_seconds
+    for _ in range(max(1, rounds // 5)):
+        renderer.show_country(engine.start_round(), engine.current_view())
+        start = time.perf_counter()
+        renderer.show_world(world_bounds)
+        durations.append(time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            break
+    results["world_view"] = summarize(durations)
+
+    # Klatki przejścia od widoku poprzedniej rundy do następnej (bez obrazu z prefetch)
+    from zoom import interpolate_view
+    durations = []
+    deadline = time.perf_counter() + max_seconds
+    for _ in range(max(1, rounds // 5)):
+        start_view = renderer.current_view()
+        index = engine.start_round()
+        end_view = engine.current_view()
+        renderer.begin_transition(end_view)
+        for t in np.linspace(0, 1, TRANSITION_FRAMES):
+            start = time.perf_counter()
+            renderer.transition_frame(interpolate_view(start_view, end_view, t))
+            durations.append(time.perf_counter() - start)
+        renderer.end_transition()
+        renderer.show_country(index, end_view)
+        if time.perf_counter() > deadline:
+            break
+    results["transition_frame"] = summarize(durations)
+
+    rng = random.Random(1)
+    durations = []
+    for _ in range(answers):
+        engine.start_round()
+        answer = synthetic_answer(engine, rng)
+        start = time.perf_counter()
+        engine.check_answer(answer)
+        durations.append(time.perf_counter() - start)
+    results["check_answer"] = summarize(durations)
+
+    results["draw"] = {name: {k: v for k, v in stats.items() if k in ("count", "p50_ms", "p99_ms")}
+                       for name, stats in perf.spans.summary().items() if name.startswith("rysowanie")}
+    results["memory"] = perf.memory_usage()
+    return results
+
+
+def metric(results, name):
+    """Mediana (lub czas) metryki w ms, np. "round" albo "load.total"."""
+    section, _, field = name.partition(".")
+    value = results.get(section)
+    if value is None:
+        return None
+    if field:
+        return value.get(field)
+    return value.get("p50_ms")
+
+
+def compare(current, baseline, threshold, min_delta_ms):
+    """Lista regresji: (zbiór, metryka, bazowa, obecna) dla wzrostów ponad próg."""
+    regressions = []
+    for dataset, results in current["datasets"].items():
+        base = baseline.get("datasets", {}).get(dataset)
+        if base is None:
+            continue
+        for name in REGRESSION_METRICS:
+            old, new = metric(base, name), metric(results, name)
+            if old is None or new is None:
+                continue
+            marker = ""
+            if new > old * threshold and new - old > min_delta_ms:
+                regressions.append((dataset, name, old, new))
+                marker = "  <-- REGRESJA"
+            print(f"  {dataset:<6} {name:<14} {old:9.2f} ms -> {new:9.2f} ms ({new / old:5.2f}x){marker}")
+    return regressions
+
+
+def copy_shapefile(shapefile_path, directory):
+    import geo_cache
+    os.makedirs(directory)
+    stem = os.path.splitext(shapefile_path)[0]
+    for ext in geo_cache.SIDECAR_EXTENSIONS:
+        if os.path.exists(stem + ext):
+            shutil.copy(stem + ext, directory)
+    return os.path.join(directory, os.path.basename(shapefile_path))
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", default="110m,1k,10k,100k",
+                        help="zbiory danych: 110m (plik z gry) i/lub " + ",".join(SYNTHETIC_SIZES))
+    parser.add_argument("--rounds", type=int, default=100, help="rundy na tryb rysowania")
+    parser.add_argument("--answers", type=int, default=2000, help="liczba sprawdzanych odpowiedzi")
+    parser.add_argument("--max-seconds", type=float, default=20.0,
+                        help="limit czasu jednego pomiaru (duże zbiory mają wtedy mniej próbek)")
+    parser.add_argument("--shapefile", help="plik shapefile dla zbioru 110m (domyślnie ten z gry)")
+    parser.add_argument("--save", metavar="PLIK", help="zapisz wyniki (np. jako nowy plik bazowy)")
+    parser.add_argument("--baseline", metavar="PLIK", help="porównaj z plikiem bazowym")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="regresja, gdy mediana wzrośnie więcej niż tyle razy")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="...i o więcej niż tyle milisekund (szum przy bardzo szybkich operacjach)")
+    args = parser.parse_args()
+
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "datasets": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="kck_bench_") as tmp_dir:
+        for dataset in args.datasets.split(","):
+            if dataset == "110m":
+                shapefile_path = args.shapefile or geo_data.find_shapefile()
+                if shapefile_path is None:
+                    print("Pomijam 110m: nie znaleziono pliku z danymi geograficznymi")
+                    continue
+                # Kopia, żeby zimny start nie kasował pamięci podręcznej gry
+                shapefile_path = copy_shapefile(shapefile_path, os.path.join(tmp_dir, "110m"))
+            elif dataset in SYNTHETIC_SIZES:
+                shapefile_path = os.path.join(tmp_dir, dataset, f"synthetic_{dataset}.shp")
+                os.makedirs(os.path.dirname(shapefile_path))
+                synthetic_world(SYNTHETIC_SIZES[dataset]).to_file(shapefile_path)
+            else:
+                parser.error(f"nieznany zbiór danych: {dataset}")
+
+            print(f"[{dataset}] pomiar...", flush=True)
+            results = bench_dataset(shapefile_path, args.rounds, args.max_seconds, args.answers)
+            report["datasets"][dataset] = results
+            print(f"[{dataset}] kraje: {results['countries']}, "
+                  f"start {results['load']['total']:.1f} ms (zimny {results['load_cold']['total']:.1f} ms), "
+                  f"runda p50 {results['round']['p50_ms']:.1f} / p99 {results['round']['p99_ms']:.1f} ms, "
+                  f"runda lod p50 {results['round_lod']['p50_ms']:.1f} ms, "
+                  f"świat p50 {results['world_view']['p50_ms']:.1f} ms, "
+                  f"klatka przejścia p99 {results['transition_frame']['p99_ms']:.1f} ms, "
+                  f"odpowiedź p99 {results['check_answer']['p99_ms']:.3f} ms")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Zapisano wyniki: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Porównanie z {args.baseline} (rewizja {baseline.get('revision')}):")
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"Regresje: {len(regressions)}")
+            sys.exit(1)
+        print("Brak regresji")
+
+
+if __name__ == "__main__":
+    main()
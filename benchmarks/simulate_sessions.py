@@ -0,0 +1,39 @@
+"""Symulacja wielu sesji quizu bez ekranu (QuizEngine).
+
+Rozgrywa N sesji wirtualnych graczy na wszystkich poziomach trudności
+i podaje przepustowość w rundach na sekundę - regresje w logice rundy
+widać bez uruchamiania Tk.
+
+Uruchomienie z katalogu głównego projektu:
+    python benchmarks/simulate_sessions.py --sessions 200 --rounds 20
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geo_data  # noqa: E402
+from quiz_engine import QuizEngine, simulate_sessions  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200, help="liczba sesji")
+    parser.add_argument("--rounds", type=int, default=20, help="liczba rund w sesji")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    shapefile_path = geo_data.find_shapefile()
+    if shapefile_path is None:
+        sys.exit("Nie znaleziono pliku z danymi geograficznymi")
+    engine = QuizEngine(geo_data.load_world_data(shapefile_path))
+
+    stats = simulate_sessions(engine, args.sessions, args.rounds, seed=args.seed)
+    print(f"Sesje: {stats['sessions']}, rundy: {stats['rounds']}, czas: {stats['seconds']:.2f} s")
+    print(f"Przepustowość: {stats['rounds_per_second']:.0f} rund/s")
+    print("Wyniki: " + ", ".join(f"{kind}={count}" for kind, count in stats['results'].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Skompilowana pamięć podręczna geometrii krajów.
+
+Przy pierwszym wczytaniu shapefile'a zapisujemy potrzebne kolumny oraz
+współrzędne w postaci płaskich tablic numpy (współrzędne + offsety pierścieni,
+poligonów i części). Przy kolejnych uruchomieniach tablice są mapowane
+z dysku (mmap), więc nie płacimy za fiona/pyogrio i GDAL.
+
+Pamięć podręczna jest unieważniana, gdy zmieni się czas modyfikacji lub
+zawartość (skrót SHA-1) pliku źródłowego albo plików towarzyszących.
+
+Z `float32=True` współrzędne są zapisywane w pojedynczej precyzji (osobny
+katalog) - plik i mapowane strony zajmują połowę miejsca, a błąd zaokrąglenia
+(ok. 1e-5 stopnia, ~1 m) jest niewidoczny w quizie. GEOS i tak przechowuje
+geometrie w podwójnej precyzji, więc zysk dotyczy odczytu, nie gotowych obiektów.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import shapely
+import geopandas as gpd
+
+# Zwiększ przy każdej zmianie formatu zapisu
+FORMAT_VERSION = 2
+
+# Pliki towarzyszące shapefile'a, z których czytane są atrybuty i układ współrzędnych
+SIDECAR_EXTENSIONS = ('.shp', '.shx', '.dbf', '.prj', '.cpg')
+
+
+def cache_dir_for(shapefile_path, float32=False):
+    """Katalog pamięci podręcznej obok pliku shapefile."""
+    directory, filename = os.path.split(os.path.abspath(shapefile_path))
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, ".kck_cache", stem + ("-f32" if float32 else ""))
+
+
+def _source_files(shapefile_path):
+    stem = os.path.splitext(shapefile_path)[0]
+    return [stem + ext for ext in SIDECAR_EXTENSIONS if os.path.exists(stem + ext)]
+
+
+def _stat_fingerprint(shapefile_path):
+    return {os.path.basename(path): [os.stat(path).st_mtime_ns, os.stat(path).st_size]
+            for path in _source_files(shapefile_path)}
+
+
+def _content_hash(shapefile_path):
+    digest = hashlib.sha1()
+    for path in _source_files(shapefile_path):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    tmp_path = os.path.join(cache_dir, "meta.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(cache_dir, "meta.json"))
+
+
+def source_fingerprint(shapefile_path):
+    """Czas modyfikacji, rozmiar i skrót plików źródłowych (pola "stat" i "sha1" metadanych)."""
+    return {"stat": _stat_fingerprint(shapefile_path), "sha1": _content_hash(shapefile_path)}
+
+
+def matches_source(shapefile_path, meta):
+    """Czy metadane z source_fingerprint odpowiadają bieżącym plikom źródłowym."""
+    if meta.get("stat") == _stat_fingerprint(shapefile_path):
+        return True
+    # Zmienił się czas modyfikacji - porównujemy zawartość, zanim wyrzucimy cache
+    return meta.get("sha1") == _content_hash(shapefile_path)
+
+
+def is_valid(shapefile_path, meta):
+    """Sprawdza, czy zapisana pamięć podręczna odpowiada plikowi źródłowemu."""
+    if meta is None or meta.get("version") != FORMAT_VERSION:
+        return False
+    return matches_source(shapefile_path, meta)
+
+
+def load(shapefile_path, float32=False):
+    """Odtwarza GeoDataFrame z pamięci podręcznej albo zwraca None, jeśli jej brak."""
+    cache_dir = cache_dir_for(shapefile_path, float32)
+    meta = _read_meta(cache_dir)
+    if not is_valid(shapefile_path, meta):
+        return None
+
+    try:
+        coords = np.load(os.path.join(cache_dir, "coords.npy"), mmap_mode='r')
+        offsets = tuple(np.load(os.path.join(cache_dir, f"offsets_{i}.npy"), mmap_mode='r')
+                        for i in range(meta["offset_levels"]))
+        single_part = np.load(os.path.join(cache_dir, "single_part.npy"))
+        with open(os.path.join(cache_dir, "attributes.json"), encoding="utf-8") as f:
+            attributes = json.load(f)
+    except (OSError, ValueError, KeyError):
+        return None
+
+    geometry = shapely.from_ragged_array(shapely.GeometryType.MULTIPOLYGON, coords, offsets)
+    # Przywrócenie zwykłych poligonów tam, gdzie w źródle nie było wielu części
+    geometry[single_part] = shapely.get_geometry(geometry[single_part], 0)
+    # Geometrie, którym zaokrąglenie do float32 dało samoprzecięcia (wyznaczone przy zapisie)
+    repair = meta.get("repair")
+    if repair:
+        try:
+            geometry[repair] = shapely.make_valid(geometry[repair], method="structure",
+                                                  keep_collapsed=False)
+        except TypeError:
+            # shapely < 2.1 nie ma metody "structure"
+            geometry[repair] = shapely.make_valid(geometry[repair])
+
+    # Jeśli mtime się zmienił, a treść nie - odświeżamy tylko metadane
+    stat = _stat_fingerprint(shapefile_path)
+    if meta["stat"] != stat:
+        meta["stat"] = stat
+        _write_meta(cache_dir, meta)
+
+    return gpd.GeoDataFrame(attributes, geometry=geometry, crs=meta.get("crs"))
+
+
+def save(shapefile_path, world_data, columns, float32=False):
+    """Zapisuje wybrane kolumny tekstowe i geometrię do pamięci podręcznej."""
+    cache_dir = cache_dir_for(shapefile_path, float32)
+    tmp_dir = cache_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    geometry = np.asarray(world_data.geometry.values)
+    # Wszystkie geometrie zapisujemy jako multipoligony (jeden wspólny układ offsetów)
+    parts, part_index = shapely.get_parts(geometry, return_index=True)
+    multipolygons = np.full(len(geometry), shapely.from_wkt("MULTIPOLYGON EMPTY"), dtype=object)
+    shapely.multipolygons(parts, indices=part_index, out=multipolygons)
+    _, coords, offsets = shapely.to_ragged_array(multipolygons)
+
+    coords = np.ascontiguousarray(coords, dtype=np.float32 if float32 else np.float64)
+    np.save(os.path.join(tmp_dir, "coords.npy"), coords)
+    repair = []
+    if float32:
+        # Zaokrąglenie może zepsuć poprawność geometrii, która w źródle była poprawna
+        rounded = shapely.from_ragged_array(shapely.GeometryType.MULTIPOLYGON, coords, offsets)
+        repair = np.flatnonzero(shapely.is_valid(multipolygons) & ~shapely.is_valid(rounded)).tolist()
+    for i, level in enumerate(offsets):
+        np.save(os.path.join(tmp_dir, f"offsets_{i}.npy"), level)
+    np.save(os.path.join(tmp_dir, "single_part.npy"),
+            shapely.get_type_id(geometry) == shapely.GeometryType.POLYGON)
+
+    attributes = {column: [str(value) for value in world_data[column]]
+                  for column in columns if column in world_data.columns}
+    with open(os.path.join(tmp_dir, "attributes.json"), "w", encoding="utf-8") as f:
+        json.dump(attributes, f, ensure_ascii=False)
+
+    _write_meta(tmp_dir, {
+        "version": FORMAT_VERSION,
+        **source_fingerprint(shapefile_path),
+        "offset_levels": len(offsets),
+        "repair": repair,
+        "crs": world_data.crs.to_wkt() if world_data.crs is not None else None,
+    })
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
@@ -0,0 +1,149 @@
+"""Wczytywanie danych geograficznych bez zależności od Tk.
+
+Funkcje z tego modułu są wywoływane z wątku roboczego, dlatego nie mogą
+pokazywać okien dialogowych - błędy zgłaszają wyjątkami.
+"""
+import os
+import sys
+
+import geopandas as gpd
+
+import geo_cache
+import name_packs
+from perf import current_rss, span
+
+# Ścieżka do pliku shapefile - dostosuj ją do swojej struktury katalogów
+SHAPEFILE_PATH = "data/ne_110m_admin_0_countries.shp"
+
+# Alternatywne ścieżki, jeśli plik nie znajduje się w katalogu data
+ALTERNATIVE_PATHS = [
+    "ne_110m_admin_0_countries.shp",  # w katalogu głównym
+    "../data/ne_110m_admin_0_countries.shp",  # jeden poziom wyżej
+    os.path.join(os.path.expanduser("~"), "Downloads", "ne_110m_admin_0_countries.shp")  # w katalogu Downloads
+]
+
+# Kolumny z nazwą, kontynentem i kodem kraju - pierwsza istniejąca w pliku
+NAME_COLUMNS = ('NAME', 'ADMIN')
+CONTINENT_COLUMNS = ('CONTINENT', 'REGION_WB', 'REGION_UN')
+# ADM0_A3 ma kod także dla krajów, którym ISO_A3 daje -99 (Francja, Norwegia, Kosowo)
+CODE_COLUMNS = ('ADM0_A3', 'ISO_A3')
+
+
+def find_shapefile():
+    """Zwraca ścieżkę do pierwszego istniejącego pliku shapefile albo None"""
+    for path in [SHAPEFILE_PATH] + ALTERNATIVE_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def lean_columns(shapefile_path):
+    """Kolumny atrybutów potrzebne grze (nazwa, kontynent i kod) spośród tych, które są w pliku"""
+    # Odczyt zerowej liczby wierszy daje same nazwy kolumn
+    available = set(gpd.read_file(shapefile_path, rows=0).columns)
+    columns = []
+    for candidates in (NAME_COLUMNS, CONTINENT_COLUMNS, CODE_COLUMNS):
+        present = [column for column in candidates if column in available]
+        if present:
+            columns.append(present[0])
+    return columns
+
+
+def read_shapefile(shapefile_path, lean=False, float32=False):
+    """Wczytuje shapefile i zapisuje potrzebne kolumny do pamięci podręcznej"""
+    if lean:
+        # Tylko potrzebne kolumny - pozostałe (ponad sto w Natural Earth) nie są nawet dekodowane
+        world_data = gpd.read_file(shapefile_path, columns=lean_columns(shapefile_path))
+    else:
+        world_data = gpd.read_file(shapefile_path)
+
+    # Sprawdź nazwy kolumn w danych
+    if 'NAME' in world_data.columns:
+        world_data = world_data.rename(columns={'NAME': 'name'})
+    elif 'ADMIN' in world_data.columns:
+        world_data = world_data.rename(columns={'ADMIN': 'name'})
+
+    # Sprawdź, czy jest kolumna z kontynentami
+    if 'CONTINENT' in world_data.columns:
+        world_data = world_data.rename(columns={'CONTINENT': 'continent'})
+    elif 'REGION_WB' in world_data.columns:
+        world_data = world_data.rename(columns={'REGION_WB': 'continent'})
+    elif 'REGION_UN' in world_data.columns:
+        world_data = world_data.rename(columns={'REGION_UN': 'continent'})
+
+    # Kod kraju, według którego dopasowujemy pakiety nazw
+    code_column = next((column for column in CODE_COLUMNS if column in world_data.columns), None)
+    if code_column is not None:
+        world_data = world_data.rename(columns={code_column: 'code'})
+
+    try:
+        geo_cache.save(shapefile_path, world_data, ['name', 'continent', 'code'], float32)
+    except OSError as e:
+        # Brak zapisu do cache nie może blokować gry (np. katalog tylko do odczytu)
+        print(f"Nie udało się zapisać pamięci podręcznej geometrii: {e}")
+
+    return world_data
+
+
+def alias_table(names, aliases):
+    """Krotki nazw alternatywnych ze wspólnymi (internowanymi) napisami.
+
+    `aliases` to nazwy z pakietu języka dla kolejnych wierszy (krotki albo
+    brak). Ta sama nazwa w wielu wierszach (np. "kongo" i nazwa z małej litery
+    równa polskiej) jest w pamięci jednym obiektem, a krotka jest mniejsza od listy.
+    """
+    return [(row_aliases if isinstance(row_aliases, tuple) else ()) + (sys.intern(name.lower()),)
+            for name, row_aliases in zip(names, aliases)]
+
+
+def load_world_data(shapefile_path, lean=False, float32=False, locale=name_packs.DEFAULT_LOCALE):
+    """Wczytuje kraje z pamięci podręcznej lub shapefile'a i uzupełnia kontynenty oraz nazwy
+
+    `lean` - tylko potrzebne kolumny, kontynent jako kategoria i wspólna tablica
+    nazw alternatywnych; `float32` - współrzędne w pamięci podręcznej w pojedynczej precyzji;
+    `locale` - język nazw do odpowiedzi (pakiet z katalogu packs).
+    """
+    rss_before = current_rss()
+
+    # Najpierw spróbuj skompilowanej pamięci podręcznej (bez GDAL)
+    with span("dane: pamięć podręczna"):
+        world_data = geo_cache.load(shapefile_path, float32)
+    if world_data is None:
+        with span("dane: odczyt shapefile"):
+            world_data = read_shapefile(shapefile_path, lean, float32)
+
+    # Pakiet nazw aktywnego języka (razem z kontynentami) - skompilowany indeks kodów krajów
+    with span("dane: pakiet nazw"):
+        pack = name_packs.load_pack(locale)
+
+    with span("dane: nazwy i kontynenty"):
+        codes = pack.country_codes(world_data['code'] if 'code' in world_data.columns else None,
+                                   world_data['name'])
+
+        # Kontynenty z pakietu regionów, jeśli nie ma ich w pliku
+        if 'continent' not in world_data.columns:
+            world_data['continent'] = codes.map(pack.continents).fillna("Unknown")
+
+        # Dodanie kolumny z alternatywnymi nazwami
+        aliases = codes.map(pack.aliases)
+        if lean:
+            world_data['alt_names'] = alias_table(world_data['name'], aliases)
+        else:
+            world_data['alt_names'] = [list(row_aliases if isinstance(row_aliases, tuple) else ()) + [name.lower()]
+                                       for name, row_aliases in zip(world_data['name'], aliases)]
+
+    if lean:
+        # Kilka kontynentów na setki wierszy - kody zamiast napisów
+        world_data['continent'] = world_data['continent'].astype('category')
+
+    print(f"Załadowano {len(world_data)} krajów")
+    rss_after = current_rss()
+    if rss_before is not None and rss_after is not None:
+        print(f"Pamięć procesu: {rss_before / 2 ** 20:.1f} MB -> {rss_after / 2 ** 20:.1f} MB, "
+              f"tabela krajów: {world_data.memory_usage(deep=True).sum() / 2 ** 20:.2f} MB")
+
+    return world_data
+
+
+def create_empty_geodataframe():
+    return gpd.GeoDataFrame(columns=['name', 'continent', 'alt_names', 'geometry'])
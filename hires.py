@@ -0,0 +1,124 @@
+"""Dokładne geometrie (Natural Earth 50m/10m) wczytywane na żądanie.
+
+Mapa podstawowa to zawsze 110m, wczytywana w całości przy starcie. Dla kraju
+pokazywanego w rundzie czytamy z warstwy 50m/10m tylko jego wiersz: filtr
+atrybutów (where NAME = ...) razem z prostokątem kraju (bbox), więc GDAL
+pomija resztę pliku. Wyniki trafiają do ograniczonej pamięci LRU, a odczyt
+odbywa się w wątku roboczym - runda zaczyna się od geometrii 110m, którą
+podmieniamy, gdy dokładna jest gotowa.
+"""
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+import geo_data
+from perf import span
+
+# Warstwy od najdokładniejszej; szukane tam, gdzie geo_data szuka warstwy 110m
+HIRES_RESOLUTIONS = ("10m", "50m")
+# Margines prostokąta (w stopniach) - granice w warstwach różnych skal nie pokrywają się dokładnie
+BBOX_MARGIN = 0.5
+
+
+def find_hires_shapefile():
+    """Ścieżka do najdokładniejszej dostępnej warstwy krajów albo None"""
+    for resolution in HIRES_RESOLUTIONS:
+        for path in [geo_data.SHAPEFILE_PATH] + geo_data.ALTERNATIVE_PATHS:
+            path = path.replace("110m", resolution)
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def sql_string(text):
+    """Napis jako literał SQL (OGR SQL) - apostrofy są podwajane."""
+    return "'" + text.replace("'", "''") + "'"
+
+
+class HiresGeometry:
+    """Dokładne geometrie krajów z world_data, czytane pojedynczo z warstwy 50m/10m."""
+
+    # Ile geometrii trzymamy w pamięci (10m potrafi mieć setki tysięcy punktów na kraj)
+    cache_size = 16
+
+    def __init__(self, shapefile_path, world_data, cache_size=None):
+        self.shapefile_path = shapefile_path
+        if cache_size is not None:
+            self.cache_size = cache_size
+        self.names = list(world_data['name'])
+        self.bounds = shapely.bounds(np.asarray(world_data.geometry.values))
+        self.crs = world_data.crs
+
+        # Odczyt zerowej liczby wierszy daje same nazwy kolumn
+        available = set(gpd.read_file(shapefile_path, rows=0).columns)
+        self.name_column = next((column for column in geo_data.NAME_COLUMNS if column in available), None)
+        if self.name_column is None:
+            print(f"Warstwa {shapefile_path} nie ma kolumny z nazwą kraju "
+                  f"({', '.join(geo_data.NAME_COLUMNS)}) - mapa zostaje w rozdzielczości 110m")
+
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hires")
+
+    def get(self, index):
+        """Dokładna geometria, jeśli już wczytana (None także wtedy, gdy jej nie ma w warstwie)."""
+        future = self._pending.get(index)
+        if future is not None and future.done():
+            del self._pending[index]
+            error = future.exception()
+            if error is not None:
+                # Bez dokładnej geometrii runda zostaje przy 110m - nie ponawiamy odczytu
+                print(f"Nie udało się wczytać dokładnej geometrii: {error}")
+            self._store(index, None if error is not None else future.result())
+        if index in self._cache:
+            self._cache.move_to_end(index)
+            return self._cache[index]
+        return None
+
+    def is_ready(self, index):
+        """Czy get() da już ostateczny wynik (bez kolumny nazw zawsze - będzie None)."""
+        if self.name_column is None:
+            return True
+        return index in self._cache or (index in self._pending and self._pending[index].done())
+
+    def is_pending(self, index):
+        """Czy odczyt geometrii jest zlecony i jeszcze trwa."""
+        return index in self._pending and not self._pending[index].done()
+
+    def request(self, index):
+        """Zleca odczyt geometrii w tle (jeśli nie ma jej jeszcze w pamięci)."""
+        if index in self._cache or index in self._pending or self.name_column is None:
+            return
+        self._pending[index] = self._executor.submit(self.read, index)
+
+    def _store(self, index, geometry):
+        self._cache[index] = geometry
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def read(self, index):
+        """Czyta geometrię kraju `index` z pliku (wywoływane w wątku roboczym)."""
+        if not np.isfinite(self.bounds[index]).all():
+            return None
+        minx, miny, maxx, maxy = self.bounds[index]
+        with span("hires: odczyt"):
+            rows = gpd.read_file(self.shapefile_path, columns=[self.name_column],
+                                 where=f"{self.name_column} = {sql_string(self.names[index])}",
+                                 bbox=(minx - BBOX_MARGIN, miny - BBOX_MARGIN,
+                                       maxx + BBOX_MARGIN, maxy + BBOX_MARGIN))
+        if len(rows) == 0:
+            return None
+        if self.crs is not None and rows.crs is not None and rows.crs != self.crs:
+            rows = rows.to_crs(self.crs)
+        geometries = np.asarray(rows.geometry.values)
+        return geometries[0] if len(geometries) == 1 else shapely.union_all(geometries)
+
+    def shutdown(self):
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=False)
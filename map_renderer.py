@@ -0,0 +1,457 @@
+"""Renderowanie mapy z trwałymi artystami i blittingiem.
+
+Warstwa świata jest budowana raz jako jedna kolekcja ścieżek, a podświetlony
+kraj to jeden artysta, któremu podmieniamy ścieżki. Tło (mapa świata dla
+danego widoku) jest zapamiętywane i przywracane przez blitting, więc zmiana
+kraju nie wymaga ponownego rysowania całej mapy przez geopandas.
+
+W trybie `lod` renderer rysuje tylko kraje, których prostokąty ograniczające
+przecinają widok (STRtree), i wybiera uproszczoną wersję geometrii dopasowaną
+do rozmiaru piksela - to ważne przy danych 50m/10m.
+
+Klatki animowanych przejść między widokami (zoom.ZoomAnimator) nie są
+rysowane: składamy je z gotowych obrazów (całego świata, widoku początkowego
+i - jeśli jest - końcowego) przeskalowanych do widoku klatki.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+from matplotlib.collections import Collection
+from matplotlib.colors import to_rgba_array
+from matplotlib.path import Path
+from shapely.geometry.polygon import orient
+
+from perf import span
+from viewports import is_geographic
+
+WORLD_STYLE = {'facecolor': '#e0e0e0', 'edgecolor': '#c0c0c0', 'linewidth': 0.5}
+HIGHLIGHT_STYLE = {'facecolor': '#66b3ff', 'edgecolor': '#0066cc', 'linewidth': 1}
+
+# Tolerancje upraszczania (w jednostkach danych, tu stopniach) dla poziomów szczegółowości
+LOD_TOLERANCES = (0.0, 0.01, 0.05, 0.25)
+# Poziom jest dobierany tak, by tolerancja nie przekraczała tylu pikseli
+LOD_PIXEL_TOLERANCE = 0.5
+
+# Obraz świata do animacji przejść ma tyle razy większą rozdzielczość niż płótno
+WORLD_IMAGE_SCALE = 2
+
+
+def simplify_levels(geometries):
+    """Geometrie uproszczone dla wszystkich poziomów LOD_TOLERANCES (słownik poziom -> tablica).
+
+    Przy dużych danych to sekundy na poziom - liczone raz, w wątku wczytującym dane.
+    """
+    geometries = np.asarray(geometries)
+    levels = {0: geometries}
+    for level, tolerance in enumerate(LOD_TOLERANCES[1:], 1):
+        levels[level] = shapely.simplify(geometries, tolerance, preserve_topology=True)
+    return levels
+
+
+def _pixels(rgba):
+    """Obraz RGBA (wysokość, szerokość, 4) jako tablica uint32 - piksel to jeden element."""
+    return np.ascontiguousarray(rgba).view(np.uint32).reshape(rgba.shape[:2])
+
+
+class GeometryCollection(Collection):
+    """Kolekcja dowolnych ścieżek (z dziurami), którym można podmieniać kształty."""
+
+    def __init__(self, paths, **kwargs):
+        super().__init__(**kwargs)
+        self.set_paths(paths)
+
+    def set_paths(self, paths):
+        self._paths = list(paths)
+        self.stale = True
+
+    def get_paths(self):
+        return self._paths
+
+
+def _ring_path(coords):
+    codes = np.full(len(coords), Path.LINETO, dtype=Path.code_type)
+    codes[0] = Path.MOVETO
+    codes[-1] = Path.CLOSEPOLY
+    return Path(coords[:, :2], codes)
+
+
+def aspect_for_view(view, geographic):
+    """Stosunek skali osi y do osi x - tak jak _update_aspect (geopandas)."""
+    if not geographic:
+        return 1.0
+    center_y = (view[1] + view[3]) / 2
+    return 1 / np.cos(np.radians(np.clip(center_y, -80, 80)))
+
+
+def pixel_transform(view, box, aspect):
+    """Skale i przesunięcia (sx, ox, sy, oy): kolumna = x * sx + ox, wiersz = y * sy + oy.
+
+    Widok jest wpasowany na środku prostokąta osi `box` (x0, y0, szerokość,
+    wysokość w pikselach, wiersze od góry) jak przy adjustable='box'.
+    """
+    minx, miny, maxx, maxy = view
+    x0, y0, width, height = box
+    scale = min(width / max(maxx - minx, 1e-9), height / max((maxy - miny) * aspect, 1e-9))
+    ox = x0 + (width - (maxx - minx) * scale) / 2 - minx * scale
+    oy = y0 + (height - (maxy - miny) * scale * aspect) / 2 + maxy * scale * aspect
+    return scale, ox, -scale * aspect, oy
+
+
+def geometry_to_path(geom):
+    """Zamienia (Multi)Polygon na jedną złożoną ścieżkę matplotlib."""
+    if geom is None or geom.is_empty:
+        return Path(np.empty((0, 2)))
+
+    rings = []
+    for polygon in shapely.get_parts(geom):
+        if polygon.geom_type != 'Polygon' or polygon.is_empty:
+            continue
+        # Zewnętrzny pierścień przeciwnie do wskazówek zegara, dziury zgodnie -
+        # wtedy reguła niezerowa Agg poprawnie wycina dziury
+        polygon = orient(polygon, sign=1.0)
+        rings.append(_ring_path(np.asarray(polygon.exterior.coords)))
+        rings.extend(_ring_path(np.asarray(ring.coords)) for ring in polygon.interiors)
+
+    if not rings:
+        return Path(np.empty((0, 2)))
+    return Path.make_compound_path(*rings)
+
+
+class MapRenderer:
+    """Rysuje mapę świata raz i przy kolejnych rundach podmienia tylko podświetlenie."""
+
+    # Ile teł (po jednym na widok) trzymamy w pamięci
+    background_cache_size = 8
+    # Przedrostek nazw odcinków w pomiarach (perf.spans)
+    span_name = "rysowanie"
+
+    def __init__(self, fig, ax, canvas, lod=False):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.lod = lod
+
+        self.country_paths = []
+        self.world_collection = None
+        self.highlight = None
+        self.geographic = False
+
+        # Tryb lod: geometrie uproszczone na kolejnych poziomach (gotowe przed pierwszym
+        # widokiem), ścieżki budowane leniwie dla (poziom, kraj) i drzewo przestrzenne
+        # do odrzucania niewidocznych
+        self.geometries = None
+        self.tree = None
+        self._lod_geometries = {}
+        self._lod_paths = {}
+        self._lod_key = None
+
+        self._backgrounds = OrderedDict()
+        self._highlight_index = None
+        # Dokładny kształt podświetlonego kraju (show_detail) - zostaje przy zmianie widoku
+        self._detail_path = None
+        self._view = None
+
+        # Warstwy animacji przejścia: (piksele, widok) oraz obraz świata z kluczem rozmiaru
+        self._transition_layers = None
+        self._world_image = None
+        self.world_data = None
+
+        self._setup_axes()
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _setup_axes(self):
+        self.ax.set_xticks([])
+        self.ax.set_yticks([])
+        self.ax.set_axis_off()
+
+    def set_world(self, world_data, lod_levels=None):
+        """Buduje warstwę świata i artystę podświetlenia (raz, po załadowaniu danych).
+
+        `lod_levels` to wynik simplify_levels policzony wcześniej (np. w wątku
+        roboczym); bez niego tryb lod upraszcza geometrie tutaj.
+        """
+        self.ax.clear()
+        self._setup_axes()
+        self._backgrounds.clear()
+        self._highlight_index = None
+        self._detail_path = None
+        self._world_image = None
+        self.world_data = world_data
+
+        self.geometries = np.asarray(world_data.geometry.values)
+        self.geographic = is_geographic(world_data)
+
+        if self.lod:
+            self.tree = shapely.STRtree(self.geometries)
+            if lod_levels is None:
+                with span(f"{self.span_name}: poziomy szczegółowości"):
+                    lod_levels = simplify_levels(self.geometries)
+            self._lod_geometries = lod_levels
+            self._lod_paths.clear()
+            self._lod_key = None
+            self.country_paths = []
+        else:
+            self.country_paths = [geometry_to_path(geom) for geom in self.geometries]
+
+        self.world_collection = GeometryCollection(self.country_paths, **WORLD_STYLE)
+        self.ax.add_collection(self.world_collection)
+
+        # Podświetlenie jest "animowane" - nie trafia do zapamiętanego tła
+        self.highlight = GeometryCollection([], animated=True, **HIGHLIGHT_STYLE)
+        self.ax.add_collection(self.highlight)
+
+    def show_country(self, index, view=None):
+        """Podświetla kraj o pozycji `index` i ustawia widok (minx, miny, maxx, maxy).
+
+        Bez `view` widok zostaje bez zmian (np. po kliknięciu w trybie "wskaż na mapie").
+        """
+        if self.highlight is None:
+            return
+        self._set_highlight(index)
+        if view is None:
+            (minx, maxx), (miny, maxy) = self.ax.get_xlim(), self.ax.get_ylim()
+            view = (minx, miny, maxx, maxy)
+        self.set_view(view)
+
+    def show_frame(self, index, view, frame):
+        """Wyświetla gotowy obraz rundy wyrenderowany poza ekranem (prefetch.RoundPrefetcher).
+
+        Stan osi jest ustawiany bez rysowania, a piksele trafiają prosto do bufora
+        płótna. Zwraca False, jeśli obraz nie pasuje do płótna - wtedy trzeba
+        narysować rundę zwykłym show_country.
+        """
+        if self.highlight is None:
+            return False
+        buffer = np.asarray(self.canvas.get_renderer().buffer_rgba())
+        if buffer.shape != frame.shape:
+            return False
+        with span(f"{self.span_name}: gotowy obraz"):
+            self._set_highlight(index)
+            self.set_view(view, draw=False)
+            buffer[...] = frame
+            self.canvas.blit(self.fig.bbox)
+        return True
+
+    def show_detail(self, index, geom):
+        """Podmienia podświetlenie kraju `index` na dokładniejszą geometrię (hires.HiresGeometry).
+
+        Kraj z mapy podstawowej jest zamalowany kolorem tła, żeby jego zgrubny
+        kształt nie wystawał spod dokładnego. Tło (warstwa świata) się nie zmienia,
+        więc odświeżenie to zwykły blit.
+        """
+        if self.highlight is None or index != self._highlight_index or geom is None:
+            return
+        base_path = self.highlight.get_paths()[0]
+        self._detail_path = geometry_to_path(geom)
+        self._set_highlight_paths([base_path, self._detail_path], detail=True)
+        self.redraw()
+
+    def connect_click(self, callback):
+        """Wywołuje callback(x, y) ze współrzędnymi danych po kliknięciu w mapę."""
+        def on_press(event):
+            if event.inaxes is self.ax and event.xdata is not None:
+                callback(event.xdata, event.ydata)
+        self.canvas.mpl_connect('button_press_event', on_press)
+
+    def _set_highlight(self, index):
+        if index != self._highlight_index:
+            self._highlight_index = index
+            self._detail_path = None
+            if not self.lod:
+                self._set_highlight_paths([self.country_paths[index]])
+
+    def _set_highlight_paths(self, paths, detail=False):
+        self.highlight.set_paths(paths)
+        if detail:
+            # Pierwsza ścieżka to maska (kraj z mapy podstawowej), druga - dokładny kształt
+            background = self.fig.get_facecolor()
+            self.highlight.set_facecolor([background, HIGHLIGHT_STYLE['facecolor']])
+            self.highlight.set_edgecolor([background, HIGHLIGHT_STYLE['edgecolor']])
+        else:
+            self.highlight.set_facecolor(HIGHLIGHT_STYLE['facecolor'])
+            self.highlight.set_edgecolor(HIGHLIGHT_STYLE['edgecolor'])
+
+    def clear_highlight(self):
+        if self.highlight is not None:
+            self._set_highlight_paths([])
+            self._highlight_index = None
+            self._detail_path = None
+            self._lod_key = None
+
+    def show_world(self, bounds):
+        self.set_view(bounds)
+
+    def current_view(self):
+        """Bieżący widok (minx, miny, maxx, maxy) albo None przed pierwszym ustawieniem."""
+        return self._view
+
+    def begin_transition(self, end, frame=None):
+        """Przygotowuje warstwy animacji od bieżącego widoku do `end` (False - bez animacji).
+
+        `frame` to gotowy obraz widoku końcowego (prefetch) - dzięki niemu ostatnie
+        klatki są ostre, zanim pojawi się zwykły obraz rundy.
+        """
+        if self.highlight is None or self._view is None:
+            return False
+        buffer = np.asarray(self.canvas.get_renderer().buffer_rgba())
+        layers = [self._world_layer(), (_pixels(buffer).copy(), self._view)]
+        if frame is not None and frame.shape == buffer.shape:
+            layers.append((_pixels(frame), tuple(end)))
+        self._transition_layers = layers
+        return True
+
+    def transition_frame(self, view):
+        """Klatka przejścia: warstwy przeskalowane do `view` (najbliższy piksel) i blit."""
+        if self._transition_layers is None:
+            return
+        buffer = _pixels(np.asarray(self.canvas.get_renderer().buffer_rgba()))
+        height, width = buffer.shape
+        sx, ox, sy, oy = pixel_transform(view, self._axes_box(width, height), aspect_for_view(view, self.geographic))
+        # Współrzędne danych środków kolumn i wierszy płótna
+        xs = (np.arange(width) + 0.5 - ox) / sx
+        ys = (np.arange(height) + 0.5 - oy) / sy
+
+        background = np.round(to_rgba_array(self.fig.get_facecolor()) * 255).astype(np.uint8)
+        buffer[...] = _pixels(background.reshape(1, 1, 4))[0, 0]
+        for pixels, layer_view in self._transition_layers:
+            layer_height, layer_width = pixels.shape
+            lsx, lox, lsy, loy = pixel_transform(layer_view, self._axes_box(layer_width, layer_height),
+                                                 aspect_for_view(layer_view, self.geographic))
+            # Klatka pokazuje tylko swój widok, a warstwa - tylko swój (poza nim jest tło)
+            columns = np.flatnonzero((xs >= max(view[0], layer_view[0])) & (xs <= min(view[2], layer_view[2])))
+            rows = np.flatnonzero((ys >= max(view[1], layer_view[1])) & (ys <= min(view[3], layer_view[3])))
+            if len(columns) == 0 or len(rows) == 0:
+                continue
+            source_columns = np.clip((xs[columns] * lsx + lox).astype(np.intp), 0, layer_width - 1)
+            source_rows = np.clip((ys[rows] * lsy + loy).astype(np.intp), 0, layer_height - 1)
+            buffer[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1] = \
+                pixels.take(source_rows, axis=0).take(source_columns, axis=1)
+        self.canvas.blit(self.fig.bbox)
+
+    def end_transition(self):
+        self._transition_layers = None
+
+    def _axes_box(self, width, height):
+        """Prostokąt osi (przed dopasowaniem proporcji) w pikselach obrazu o danym rozmiarze."""
+        position = self.ax.get_position(original=True)
+        return (position.x0 * width, (1 - position.y1) * height, position.width * width,
+                position.height * height)
+
+    def _world_layer(self):
+        """Obraz całego świata (bez podświetlenia) renderowany raz dla danego rozmiaru płótna."""
+        size = (int(self.fig.bbox.width), int(self.fig.bbox.height))
+        if self._world_image is None or self._world_image[0] != size:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            with span(f"{self.span_name}: obraz świata"):
+                figure = Figure(figsize=self.fig.get_size_inches(), dpi=self.fig.dpi * WORLD_IMAGE_SCALE,
+                                facecolor=self.fig.get_facecolor())
+                ax = figure.add_subplot()
+                ax.set_position(self.ax.get_position(original=True))
+                renderer = MapRenderer(figure, ax, FigureCanvasAgg(figure), lod=self.lod)
+                renderer.background_cache_size = 0
+                renderer.span_name = self.span_name
+                renderer.set_world(self.world_data, self._lod_geometries if self.lod else None)
+                view = tuple(shapely.total_bounds(self.geometries))
+                renderer.set_view(view)
+                pixels = _pixels(np.asarray(figure.canvas.buffer_rgba())).copy()
+            self._world_image = (size, (pixels, view))
+        return self._world_image[1]
+
+    def set_view(self, view, draw=True):
+        minx, miny, maxx, maxy = view
+        self._view = (float(minx), float(miny), float(maxx), float(maxy))
+        self.ax.set_xlim(minx, maxx)
+        self.ax.set_ylim(miny, maxy)
+        self._update_aspect()
+        if self.lod:
+            self._update_lod(view)
+        if draw:
+            self.redraw()
+
+    def lod_level(self, view):
+        """Najbardziej uproszczony poziom, którego tolerancja mieści się w pół piksela."""
+        minx, miny, maxx, maxy = view
+        bbox = self.ax.bbox
+        units_per_pixel = max((maxx - minx) / max(bbox.width, 1), (maxy - miny) / max(bbox.height, 1))
+        level = 0
+        for i, tolerance in enumerate(LOD_TOLERANCES):
+            if tolerance <= units_per_pixel * LOD_PIXEL_TOLERANCE:
+                level = i
+        return level
+
+    def _lod_path(self, level, index):
+        path = self._lod_paths.get((level, index))
+        if path is None:
+            path = self._lod_paths[(level, index)] = geometry_to_path(self._lod_geometries[level][index])
+        return path
+
+    def _update_lod(self, view):
+        level = self.lod_level(view)
+        visible = self.tree.query(shapely.box(*view))
+        visible.sort()
+        key = (level, visible.tobytes(), self._highlight_index)
+        if key == self._lod_key:
+            return
+        self._lod_key = key
+
+        self.world_collection.set_paths([self._lod_path(level, i) for i in visible])
+        if self._highlight_index is not None:
+            base_path = self._lod_path(level, self._highlight_index)
+            if self._detail_path is not None:
+                # Maska nadąża za poziomem warstwy świata, dokładny kształt zostaje
+                self._set_highlight_paths([base_path, self._detail_path], detail=True)
+            else:
+                self._set_highlight_paths([base_path])
+
+    def _update_aspect(self):
+        # Tak samo jak geopandas: dla współrzędnych geograficznych korygujemy
+        # proporcje według szerokości geograficznej środka widoku
+        if self.geographic:
+            center_y = sum(self.ax.get_ylim()) / 2
+            self.ax.set_aspect(1 / np.cos(np.radians(np.clip(center_y, -80, 80))))
+        else:
+            self.ax.set_aspect('equal')
+
+    def _view_key(self):
+        bbox = self.fig.bbox
+        return (tuple(self.ax.get_xlim()), tuple(self.ax.get_ylim()),
+                int(bbox.width), int(bbox.height))
+
+    def redraw(self):
+        """Odświeża płótno: z zapamiętanego tła, jeśli widok już był rysowany."""
+        background = self._backgrounds.get(self._view_key())
+        if background is None:
+            # Pełne rysowanie - tło i podświetlenie dorysuje _on_draw
+            with span(f"{self.span_name}: pełne"):
+                self.canvas.draw()
+            return
+
+        with span(f"{self.span_name}: blit"):
+            self._backgrounds.move_to_end(self._view_key())
+            self.canvas.restore_region(background)
+            self.ax.draw_artist(self.highlight)
+            self.canvas.blit(self.fig.bbox)
+
+    def savefig(self, fname, **kwargs):
+        """Zapisuje mapę do pliku (PNG, SVG...) razem z podświetleniem."""
+        # Animowani artyści są pomijani przy zwykłym rysowaniu figury
+        self.highlight.set_animated(False)
+        try:
+            self.fig.savefig(fname, **kwargs)
+        finally:
+            self.highlight.set_animated(True)
+
+    def _on_draw(self, event):
+        if self.highlight is None or self.highlight.axes is None:
+            return
+        # Rysowanie do innego płótna (savefig do SVG/PDF) nie dotyczy blittingu
+        if event.canvas is not self.canvas:
+            return
+        # Wywoływane po każdym pełnym rysowaniu (także po zmianie rozmiaru okna)
+        self._backgrounds[self._view_key()] = self.canvas.copy_from_bbox(self.fig.bbox)
+        while len(self._backgrounds) > self.background_cache_size:
+            self._backgrounds.popitem(last=False)
+        self.ax.draw_artist(self.highlight)
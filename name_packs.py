@@ -0,0 +1,131 @@
+"""Pakiety nazw krajów (języki) i regionów w plikach JSON z katalogu packs.
+
+packs/regions.json przypisuje kodowi kraju (ADM0_A3 z Natural Earth)
+kontynent, nazwy angielskie (także skrócone, jak w kolumnie NAME) i kody
+alternatywne (ISO_A3, gdy różni się od ADM0_A3). packs/<język>.json zawiera
+nazwy do odpowiedzi w danym języku - pierwsza, zapisana z wielkimi literami,
+jest wyświetlana. Dodanie języka to nowy plik, nie zmiana kodu.
+
+Pakiet regionów i pakiet aktywnego języka są przy pierwszym użyciu
+kompilowane do jednego indeksu (packs/.kck_cache/<język>.json: posortowane
+kody i odpowiadające im kontynenty i nazwy w równoległych listach),
+unieważnianego zmianą plików źródłowych. Inne języki nie są w ogóle czytane.
+"""
+import json
+import os
+import sys
+
+import pandas as pd
+
+PACKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "packs")
+REGIONS_PACK = "regions"
+DEFAULT_LOCALE = "pl"
+
+# Zwiększ przy każdej zmianie formatu skompilowanego indeksu
+FORMAT_VERSION = 1
+
+
+def pack_path(name, packs_dir=PACKS_DIR):
+    return os.path.join(packs_dir, name + ".json")
+
+
+def available_locales(packs_dir=PACKS_DIR):
+    """Kody języków, dla których są pakiety nazw."""
+    try:
+        files = os.listdir(packs_dir)
+    except OSError:
+        return []
+    return sorted(os.path.splitext(f)[0] for f in files
+                  if f.endswith(".json") and os.path.splitext(f)[0] != REGIONS_PACK)
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _source_stat(paths):
+    return [[os.path.basename(path), os.stat(path).st_mtime_ns, os.stat(path).st_size] for path in paths]
+
+
+def compile_pack(locale, packs_dir=PACKS_DIR):
+    """Łączy pakiet regionów i języka w listy posortowane według kodu kraju."""
+    regions = _read_json(pack_path(REGIONS_PACK, packs_dir))["countries"]
+    names = _read_json(pack_path(locale, packs_dir))["names"]
+
+    rows = {}
+    name_codes = {}
+    for code, region in regions.items():
+        row = (region.get("continent"), names.get(code, []))
+        # Kody alternatywne wskazują na ten sam kraj
+        for alias_code in [code] + region.get("codes", []):
+            rows[alias_code] = row
+        for name in region.get("names", []):
+            name_codes[name] = code
+    # Kraje z pakietu języka, których nie ma w pakiecie regionów (bez kontynentu)
+    for code, aliases in names.items():
+        rows.setdefault(code, (None, aliases))
+
+    codes = sorted(rows)
+    known_names = sorted(name_codes)
+    return {
+        "codes": codes,
+        "continents": [rows[code][0] for code in codes],
+        "aliases": [rows[code][1] for code in codes],
+        "names": known_names,
+        "name_codes": [name_codes[name] for name in known_names],
+    }
+
+
+class NamePack:
+    """Skompilowany pakiet: kontynent i nazwy dla kodu kraju, kod dla nazwy angielskiej."""
+
+    def __init__(self, locale, index):
+        self.locale = locale
+        codes = index["codes"]
+        self.continents = pd.Series(index["continents"], index=codes, dtype=object)
+        # Krotki internowanych napisów - wspólne dla wszystkich wierszy tego samego kraju
+        self.aliases = pd.Series([tuple(sys.intern(alias) for alias in aliases) for aliases in index["aliases"]],
+                                 index=codes, dtype=object)
+        self.codes_by_name = pd.Series(index["name_codes"], index=index["names"], dtype=object)
+
+    def country_codes(self, codes, names):
+        """Kody krajów dla wierszy: z kolumny kodów (jeśli jest), a brakujące - według nazwy."""
+        if codes is None:
+            return names.map(self.codes_by_name)
+        # Natural Earth oznacza brak kodu jako -99
+        found = codes.where(codes.isin(self.aliases.index))
+        missing = found.isna()
+        if missing.any():
+            found[missing] = names[missing].map(self.codes_by_name)
+        return found
+
+
+def cache_path_for(locale, packs_dir=PACKS_DIR):
+    return os.path.join(packs_dir, ".kck_cache", locale + ".json")
+
+
+def load_pack(locale=DEFAULT_LOCALE, packs_dir=PACKS_DIR):
+    """Pakiet języka `locale` z indeksu skompilowanego wcześniej albo kompilowany teraz."""
+    sources = [pack_path(REGIONS_PACK, packs_dir), pack_path(locale, packs_dir)]
+    stat = _source_stat(sources)
+    cache_path = cache_path_for(locale, packs_dir)
+    try:
+        cached = _read_json(cache_path)
+        if cached.get("version") == FORMAT_VERSION and cached.get("stat") == stat:
+            return NamePack(locale, cached)
+    except (OSError, ValueError):
+        pass
+
+    index = compile_pack(locale, packs_dir)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": FORMAT_VERSION, "stat": stat, **index}, f, ensure_ascii=False,
+                      separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # Brak zapisu nie może blokować gry - pakiet skompilujemy przy następnym starcie
+        print(f"Nie udało się zapisać skompilowanego pakietu nazw: {e}")
+    return NamePack(locale, index)
@@ -0,0 +1,270 @@
+"""Pomiary wydajności: fazy uruchamiania, odcinki czasu, pamięć i profilowanie.
+
+Moduł nie importuje ciężkich bibliotek - jest ładowany, zanim pojawi się okno.
+Raport JSON (opcja --perf-report lub zmienna KCK_PERF_REPORT) zbiera czasy
+faz startu, percentyle odcinków (runda, odpowiedź, rysowanie...) i zużycie
+pamięci, a w trybie profilowania (--profile lub KCK_PROFILE=1) także
+najdroższe funkcje z cProfile i miejsca alokacji z tracemalloc.
+"""
+import cProfile
+import functools
+import json
+import os
+import platform
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+# Budżet czasu do pojawienia się pierwszego okna (w sekundach);
+# można go nadpisać zmienną środowiskową KCK_FIRST_WINDOW_BUDGET_MS
+FIRST_WINDOW_BUDGET = float(os.environ.get("KCK_FIRST_WINDOW_BUDGET_MS", 300)) / 1000
+
+# Ile ostatnich pomiarów każdego odcinka trzymamy do liczenia percentyli
+SPAN_HISTORY = 10000
+
+
+def env_flag(name):
+    return os.environ.get(name, "").strip().lower() not in ("", "0", "false", "no")
+
+
+class PhaseTimer:
+    """Zbiera czasy nazwanych faz startu (także z wątków roboczych)."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def record(self, name, duration):
+        with self._lock:
+            self.phases.append((name, duration, self.elapsed()))
+
+    def mark(self, name):
+        """Zapisuje moment (od startu procesu) bez mierzenia długości fazy."""
+        self.record(name, 0.0)
+
+    @contextmanager
+    def phase(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - begin)
+
+    def get(self, name):
+        for phase_name, duration, at in self.phases:
+            if phase_name == name:
+                return duration, at
+        return None
+
+    def snapshot(self):
+        """Kopia listy (nazwa, czas trwania, moment zakończenia) bezpieczna wątkowo."""
+        with self._lock:
+            return list(self.phases)
+
+    def report(self):
+        phases = self.snapshot()
+        lines = ["Czasy uruchamiania:"]
+        for name, duration, at in phases:
+            if duration:
+                lines.append(f"  {name:<24} {duration * 1000:8.1f} ms   (koniec po {at * 1000:.0f} ms)")
+            else:
+                lines.append(f"  {name:<24} {'':>8}      (po {at * 1000:.0f} ms)")
+        return "\n".join(lines)
+
+    def check_first_window(self, name="pierwsze okno", budget=FIRST_WINDOW_BUDGET):
+        """Zwraca True, jeśli pierwsze okno pojawiło się w budżecie czasu."""
+        entry = self.get(name)
+        if entry is None:
+            return False
+        within_budget = entry[1] <= budget
+        if not within_budget:
+            print(f"Uwaga: pierwsze okno po {entry[1] * 1000:.0f} ms "
+                  f"(budżet {budget * 1000:.0f} ms)")
+        return within_budget
+
+
+def percentile(sorted_values, q):
+    """Percentyl metodą najbliższej pozycji (bez numpy)."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+class SpanRecorder:
+    """Czasy nazwanych odcinków (np. "runda", "odpowiedź") do percentyli w raporcie."""
+
+    def __init__(self, history=SPAN_HISTORY):
+        self.history = history
+        self._durations = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, duration):
+        with self._lock:
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = self._durations[name] = deque(maxlen=self.history)
+            durations.append(duration)
+
+    @contextmanager
+    def span(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - begin)
+
+    def clear(self):
+        with self._lock:
+            self._durations.clear()
+
+    def summary(self):
+        """Liczba pomiarów i percentyle (w ms) dla każdego odcinka."""
+        with self._lock:
+            snapshot = {name: sorted(durations) for name, durations in self._durations.items()}
+        return {name: {
+            "count": len(values),
+            "mean_ms": sum(values) / len(values) * 1000,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p90_ms": percentile(values, 90) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": values[-1] * 1000,
+        } for name, values in snapshot.items() if values}
+
+
+# Wspólny rejestr odcinków całego procesu (moduły nie muszą przekazywać sobie obiektów)
+spans = SpanRecorder()
+
+
+def span(name):
+    return spans.span(name)
+
+
+def timed(name):
+    """Dekorator: każde wywołanie funkcji jest mierzone jako odcinek `name`."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with spans.span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _windows_rss():
+    import ctypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong)] + [
+            (field, ctypes.c_size_t) for field in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.WorkingSetSize
+
+
+def current_rss():
+    """Pamięć fizyczna procesu w bajtach (None, jeśli system jej nie udostępnia)."""
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        if sys.platform == "win32":
+            return _windows_rss()
+        import resource
+        # Na macOS ru_maxrss to szczyt w bajtach - lepsze przybliżenie niż nic
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except (OSError, ValueError, AttributeError, ImportError):
+        return None
+
+
+def memory_usage():
+    """Zużycie pamięci w MB: cały proces i (przy tracemalloc) obiekty Pythona."""
+    usage = {}
+    rss = current_rss()
+    if rss is not None:
+        usage["rss_mb"] = rss / 2 ** 20
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        usage["python_mb"] = current / 2 ** 20
+        usage["python_peak_mb"] = peak / 2 ** 20
+    return usage
+
+
+class Profiler:
+    """cProfile i tracemalloc dla wątku, w którym działa aplikacja."""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.running = False
+
+    def start(self):
+        tracemalloc.start()
+        self.profile.enable()
+        self.running = True
+
+    def stop(self):
+        if self.running:
+            self.profile.disable()
+            self.running = False
+
+    def top_functions(self, limit=25):
+        stats = pstats.Stats(self.profile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [{
+            "function": f"{os.path.basename(filename)}:{line}({name})",
+            "calls": calls,
+            "total_ms": total * 1000,
+            "cumulative_ms": cumulative * 1000,
+        } for (filename, line, name), (_, calls, total, cumulative, _) in rows]
+
+    @staticmethod
+    def top_allocations(limit=15):
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot()
+        return [{"place": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                 "size_mb": stat.size / 2 ** 20, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:limit]]
+
+    def dump(self, path):
+        """Zapis w formacie pstats (do snakeviz, `python -m pstats` itp.)."""
+        self.profile.dump_stats(path)
+
+
+def build_report(startup_timer=None, profiler=None):
+    """Raport do pliku JSON - do dołączania do zgłoszeń z wolnych komputerów."""
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "startup": [],
+        "spans": spans.summary(),
+        "memory": memory_usage(),
+    }
+    if startup_timer is not None:
+        report["startup"] = [{"phase": name, "ms": duration * 1000, "at_ms": at * 1000}
+                             for name, duration, at in startup_timer.snapshot()]
+    if profiler is not None:
+        report["profile"] = {
+            "functions": profiler.top_functions(),
+            "allocations": profiler.top_allocations(),
+        }
+    return report
+
+
+def write_report(path, report):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
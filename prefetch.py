@@ -0,0 +1,82 @@
+"""Renderowanie następnej rundy w tle, gdy gracz jeszcze odpowiada.
+
+Wątek roboczy ma własną figurę Agg (poza ekranem) o tym samym rozmiarze co
+płótno w oknie i własny MapRenderer. Gotowy obraz rundy to bufor RGBA, który
+przy przejściu do następnej rundy jest tylko kopiowany na płótno.
+
+Matplotlib nie jest bezpieczny wątkowo dla wspólnych figur, dlatego wątek
+roboczy nigdy nie dotyka figury z okna - ma wyłącznie swoją.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from map_renderer import MapRenderer
+
+
+class RoundPrefetcher:
+    def __init__(self, world_data, lod=False, lod_levels=None):
+        self.world_data = world_data
+        self.lod = lod
+        self.lod_levels = lod_levels
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._figure = None
+        self._renderer = None
+        self._pending = None
+
+    @staticmethod
+    def frame_key(index, view, fig, generation):
+        """Klucz obrazu: kraj, widok, rozmiar figury i "pokolenie" ustawień gry."""
+        size = (tuple(fig.get_size_inches()), fig.dpi)
+        return index, tuple(float(v) for v in view), size, generation
+
+    def request(self, index, view, fig, generation):
+        """Zleca wyrenderowanie rundy w tle (poprzednie zlecenie przestaje być ważne)."""
+        key = self.frame_key(index, view, fig, generation)
+        if self._pending is not None:
+            if self._pending[0] == key:
+                return
+            self._pending[1].cancel()
+        future = self._executor.submit(self._render, index, view, *key[2])
+        self._pending = (key, future)
+
+    def take(self, index, view, fig, generation):
+        """Gotowy obraz dla tej rundy albo None (wtedy trzeba rysować normalnie)."""
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return None
+        key, future = pending
+        if key != self.frame_key(index, view, fig, generation) or not future.done():
+            future.cancel()
+            return None
+        if future.cancelled() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def invalidate(self):
+        """Porzuca zlecone renderowanie (np. po zmianie poziomu trudności)."""
+        if self._pending is not None:
+            self._pending[1].cancel()
+            self._pending = None
+
+    def shutdown(self):
+        self.invalidate()
+        self._executor.shutdown(wait=False)
+
+    def _render(self, index, view, size_inches, dpi):
+        # Wykonywane w wątku roboczym
+        if self._figure is None or tuple(self._figure.get_size_inches()) != size_inches \
+                or self._figure.dpi != dpi:
+            self._figure = Figure(figsize=size_inches, dpi=dpi)
+            ax = self._figure.add_subplot()
+            canvas = FigureCanvasAgg(self._figure)
+            self._renderer = MapRenderer(self._figure, ax, canvas, lod=self.lod)
+            # Poza ekranem nie ma blittingu - zapamiętywanie teł tylko zajmowałoby pamięć
+            self._renderer.background_cache_size = 0
+            self._renderer.span_name = "prefetch"
+            self._renderer.set_world(self.world_data, self.lod_levels)
+
+        self._renderer.show_country(index, view)
+        return np.asarray(self._figure.canvas.buffer_rgba()).copy()
@@ -0,0 +1,316 @@
+"""Wstępne renderowanie obrazów quizu do pamięci podręcznej (PNG i SVG).
+
+Każdy kraj jest rysowany tym samym MapRendererem, z tym samym widokiem
+(viewports) i stylem co w grze, a obrazy trafiają do katalogu adresowanego
+treścią: nazwa pliku to skrót SHA-256 wszystkiego, co wpływa na obraz -
+geometrii podświetlonego kraju i krajów widocznych w kadrze, widoku, stylu,
+rozmiaru i wersji matplotlib. Ponowne uruchomienie renderuje więc tylko
+obrazy, których klucz się zmienił (brakuje pliku), a gra i inne frontendy
+obsługują rundę jednym odczytem pliku.
+
+Praca jest dzielona na paczki krajów rozdawane procesom (ProcessPoolExecutor);
+każdy proces raz wczytuje dane i buduje własną figurę.
+
+Uruchomienie z katalogu głównego projektu:
+    python prerender.py --size 1000x600 --jobs 8
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import shapely
+
+# Zwiększ przy każdej zmianie sposobu rysowania, której nie widać w stylu
+RENDER_VERSION = 1
+
+DEFAULT_SIZE = (1000, 600)
+DEFAULT_DPI = 100
+FORMATS = ('png', 'svg')
+# Ile krajów dostaje proces za jednym razem
+BATCH_SIZE = 8
+
+
+def default_cache_dir(shapefile_path):
+    """Katalog obrazów obok pamięci podręcznej geometrii (wspólny dla wszystkich danych)."""
+    import geo_cache
+    return os.path.join(os.path.dirname(geo_cache.cache_dir_for(shapefile_path)), "images")
+
+
+def parse_size(text):
+    width, height = (int(n) for n in text.lower().split("x"))
+    return width, height
+
+
+def style_fingerprint(size, dpi, geographic):
+    """Wszystko poza geometrią i widokiem, od czego zależy wygląd obrazu."""
+    import matplotlib
+    from map_renderer import HIGHLIGHT_STYLE, WORLD_STYLE
+    return json.dumps({
+        "version": RENDER_VERSION,
+        "matplotlib": matplotlib.__version__,
+        "world": WORLD_STYLE,
+        "highlight": HIGHLIGHT_STYLE,
+        "size": list(size),
+        "dpi": float(dpi),
+        "geographic": geographic,
+    }, sort_keys=True).encode()
+
+
+def image_keys(world_data, views, size, dpi):
+    """Klucz obrazu dla każdego kraju (None, jeśli kraj nie ma widoku)."""
+    geometries = np.asarray(world_data.geometry.values)
+    from viewports import is_geographic
+    geographic = is_geographic(world_data)
+    fingerprint = style_fingerprint(size, dpi, geographic)
+    wkb = shapely.to_wkb(geometries)
+    tree = shapely.STRtree(geometries)
+
+    keys = []
+    for index, view in enumerate(np.asarray(views, dtype=float)):
+        if not np.isfinite(view).all():
+            keys.append(None)
+            continue
+        digest = hashlib.sha256(fingerprint)
+        digest.update(view.tobytes())
+        digest.update(wkb[index])
+        # Tło obrazu to kraje widoczne w kadrze - zmiana sąsiada też zmienia obraz
+        for visible in np.sort(tree.query(shapely.box(*view))):
+            digest.update(wkb[visible])
+        keys.append(digest.hexdigest())
+    return keys
+
+
+def image_path(cache_dir, key, fmt):
+    return os.path.join(cache_dir, key[:2], f"{key}.{fmt}")
+
+
+def manifest_path(cache_dir, size):
+    return os.path.join(cache_dir, f"manifest-{size[0]}x{size[1]}.json")
+
+
+class ImageCache:
+    """Odczyt gotowych obrazów rund - jeden odczyt pliku na rundę.
+
+    Klucze są liczone z danych wczytanych przez grę, więc obraz z innej wersji
+    danych lub stylu nie zostanie pomylony z aktualnym - po prostu go nie ma.
+    """
+
+    def __init__(self, cache_dir, world_data, views):
+        self.cache_dir = cache_dir
+        self.world_data = world_data
+        self.views = views
+        self._keys = {}
+
+    def keys(self, size, dpi=DEFAULT_DPI):
+        """Klucze wszystkich krajów dla rozmiaru obrazu (liczone raz na rozmiar)."""
+        keys = self._keys.get((size, dpi))
+        if keys is None:
+            keys = self._keys[(size, dpi)] = image_keys(self.world_data, self.views, size, dpi)
+            self._check_size(size, dpi)
+        return keys
+
+    def cached_sizes(self):
+        """Rozmiary obrazów, dla których prerender.py zapisał manifest."""
+        sizes = []
+        with contextlib.suppress(OSError):
+            for name in os.listdir(self.cache_dir):
+                if name.startswith("manifest-") and name.endswith(".json"):
+                    with contextlib.suppress(ValueError):
+                        sizes.append(parse_size(name[len("manifest-"):-len(".json")]))
+        return sorted(sizes)
+
+    def _check_size(self, size, dpi):
+        # Obraz pasuje tylko do płótna dokładnie tego rozmiaru - inaczej każda runda
+        # byłaby rysowana od nowa, a gracz nie wiedziałby dlaczego
+        sizes = self.cached_sizes()
+        if tuple(size) in sizes:
+            return
+        command = f"python prerender.py --size {size[0]}x{size[1]}"
+        if dpi != DEFAULT_DPI:
+            command += f" --dpi {dpi:g}"
+        found = ", ".join(f"{width}x{height}" for width, height in sizes) or "brak"
+        print(f"Pamięć obrazów nie ma obrazów {size[0]}x{size[1]} (są: {found}) - "
+              f"obrazy rund będą rysowane na bieżąco. Aby ich użyć: {command}")
+
+    def path(self, index, size, dpi=DEFAULT_DPI, fmt='png'):
+        key = self.keys(size, dpi)[index]
+        return None if key is None else image_path(self.cache_dir, key, fmt)
+
+    def has(self, index, size, dpi=DEFAULT_DPI, fmt='png'):
+        path = self.path(index, size, dpi, fmt)
+        return path is not None and os.path.exists(path)
+
+    def read_bytes(self, index, size, dpi=DEFAULT_DPI, fmt='png'):
+        """Zawartość pliku obrazu albo None, jeśli nie został wyrenderowany."""
+        path = self.path(index, size, dpi, fmt)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def read_rgba(self, index, fig):
+        """Obraz rundy jako tablica RGBA o rozmiarze figury (do MapRenderer.show_frame)."""
+        size = (int(fig.bbox.width), int(fig.bbox.height))
+        data = self.read_bytes(index, size, fig.dpi)
+        if data is None:
+            return None
+        from PIL import Image
+        return np.asarray(Image.open(io.BytesIO(data)).convert("RGBA"))
+
+
+def build_manifest(world_data, keys, size, dpi):
+    """Opis pamięci podręcznej dla innych frontendów: klucz każdego kraju i poziomy trudności."""
+    from quiz_engine import build_difficulty_index
+    return {
+        "version": RENDER_VERSION,
+        "size": list(size),
+        "dpi": dpi,
+        "formats": list(FORMATS),
+        "countries": [{"name": name, "key": key} for name, key in zip(world_data['name'], keys)],
+        "difficulties": {difficulty: positions.tolist()
+                         for difficulty, positions in build_difficulty_index(world_data).items()},
+    }
+
+
+def _write_atomic(path, write):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+# Stan procesu roboczego: dane i własna figura (budowane raz na proces)
+_worker = None
+
+
+def init_worker(shapefile_path, size, dpi):
+    global _worker
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    import geo_data
+    import viewports
+    from map_renderer import MapRenderer
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        world_data = geo_data.load_world_data(shapefile_path)
+
+    fig = Figure(figsize=(size[0] / dpi, size[1] / dpi), dpi=dpi)
+    ax = fig.add_subplot()
+    renderer = MapRenderer(fig, ax, FigureCanvasAgg(fig))
+    # Poza ekranem nie ma blittingu - zapamiętywanie teł tylko zajmowałoby pamięć
+    renderer.background_cache_size = 0
+    renderer.set_world(world_data)
+    _worker = (renderer, viewports.build_viewport_index(world_data))
+
+
+def _write_png(renderer, f):
+    from PIL import Image
+    # Piksele prosto z bufora Agg - identyczne z tym, co rysuje gra
+    Image.fromarray(np.asarray(renderer.canvas.buffer_rgba())).save(f, format='png')
+
+
+def _render_batch(cache_dir, tasks, formats):
+    """Renderuje paczkę (pozycja, klucz) w procesie roboczym; zwraca liczbę obrazów."""
+    renderer, views = _worker
+    for index, key in tasks:
+        renderer.show_country(index, views[index])
+        if 'png' in formats:
+            _write_atomic(image_path(cache_dir, key, 'png'), lambda f: _write_png(renderer, f))
+        if 'svg' in formats:
+            _write_atomic(image_path(cache_dir, key, 'svg'),
+                          lambda f: renderer.savefig(f, format='svg'))
+    return len(tasks)
+
+
+def render_png(index):
+    """Renderuje jeden kraj w procesie roboczym (po init_worker) i zwraca plik PNG."""
+    renderer, views = _worker
+    renderer.show_country(index, views[index])
+    buffer = io.BytesIO()
+    _write_png(renderer, buffer)
+    return buffer.getvalue()
+
+
+def prerender(shapefile_path, cache_dir, size=DEFAULT_SIZE, dpi=DEFAULT_DPI, jobs=None,
+              formats=FORMATS, force=False):
+    """Renderuje brakujące obrazy wszystkich krajów i zapisuje manifest; zwraca statystyki."""
+    import geo_data
+    import viewports
+
+    world_data = geo_data.load_world_data(shapefile_path)
+    views = viewports.build_viewport_index(world_data)
+    keys = image_keys(world_data, views, size, dpi)
+
+    todo = [(index, key) for index, key in enumerate(keys) if key is not None and (
+        force or not all(os.path.exists(image_path(cache_dir, key, fmt)) for fmt in formats))]
+    batches = [todo[i:i + BATCH_SIZE] for i in range(0, len(todo), BATCH_SIZE)]
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(batches) or 1))
+
+    start = time.perf_counter()
+    rendered = 0
+    if batches:
+        with ProcessPoolExecutor(jobs, initializer=init_worker,
+                                 initargs=(shapefile_path, size, dpi)) as executor:
+            futures = [executor.submit(_render_batch, cache_dir, batch, formats) for batch in batches]
+            for future in as_completed(futures):
+                rendered += future.result()
+                print(f"\r  {rendered}/{len(todo)}", end="", file=sys.stderr, flush=True)
+        print(file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    manifest = build_manifest(world_data, keys, size, dpi)
+    _write_atomic(manifest_path(cache_dir, size),
+                  lambda f: f.write(json.dumps(manifest, ensure_ascii=False).encode("utf-8")))
+
+    return {
+        "countries": len(world_data),
+        "rendered": rendered,
+        "skipped": sum(key is not None for key in keys) - rendered,
+        "jobs": jobs,
+        "seconds": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="x".join(map(str, DEFAULT_SIZE)),
+                        help="rozmiar obrazu w pikselach, np. 1000x600 (taki jak płótno w grze - "
+                             "gra podaje go, gdy w pamięci obrazów brakuje tego rozmiaru)")
+    parser.add_argument("--dpi", type=float, default=DEFAULT_DPI)
+    parser.add_argument("--jobs", "-j", type=int, help="liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="formaty obrazów, np. png,svg")
+    parser.add_argument("--cache-dir", help="katalog obrazów (domyślnie .kck_cache/images obok danych)")
+    parser.add_argument("--shapefile", help="plik shapefile (domyślnie ten sam co w grze)")
+    parser.add_argument("--force", action="store_true", help="renderuj wszystko od nowa")
+    args = parser.parse_args()
+
+    import geo_data
+    shapefile_path = args.shapefile or geo_data.find_shapefile()
+    if shapefile_path is None:
+        sys.exit("Nie znaleziono pliku z danymi geograficznymi")
+    cache_dir = args.cache_dir or default_cache_dir(shapefile_path)
+    formats = tuple(fmt for fmt in args.formats.split(",") if fmt in FORMATS)
+
+    stats = prerender(shapefile_path, cache_dir, parse_size(args.size), args.dpi, args.jobs,
+                      formats, args.force)
+    print(f"Wyrenderowano {stats['rendered']} obrazów, {stats['skipped']} aktualnych pominięto "
+          f"({stats['seconds']:.1f} s, procesy: {stats['jobs']})")
+    if stats['rendered']:
+        print(f"Średnio {stats['seconds'] / stats['rendered'] * 1000:.0f} ms na kraj")
+    print(f"Katalog: {cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
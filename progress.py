@@ -0,0 +1,288 @@
+"""Trwały dziennik odpowiedzi (SQLite) i powtórki rozłożone w czasie.
+
+Każda odpowiedź trafia do tabeli `attempts`, a podsumowanie kraju (liczba
+prób i błędów, seria poprawnych, odstęp i termin powtórki) do `country_stats`.
+Przy starcie czytamy tylko podsumowania - kilkaset wierszy niezależnie od
+tego, ile odpowiedzi zebrał profil.
+
+Zapis odbywa się w osobnym wątku z własnym połączeniem: odpowiedź w grze
+tylko wkłada wiersze do kolejki, a wątek zapisuje je paczkami w jednej
+transakcji (baza w trybie WAL), więc pętla Tk nigdy nie czeka na dysk.
+
+ReviewQueue wybiera kraj rundy z kopca kluczowanego terminem powtórki
+pomniejszonym o wagę błędów - najpierw zaległe i najsłabiej znane kraje.
+"""
+import heapq
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    country TEXT NOT NULL,
+    difficulty TEXT,
+    mode TEXT,
+    kind TEXT,
+    correct INTEGER NOT NULL,
+    answered TEXT
+);
+CREATE TABLE IF NOT EXISTS country_stats (
+    country TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    streak INTEGER NOT NULL,
+    interval REAL NOT NULL,
+    due REAL NOT NULL
+);
+"""
+
+# Odstępy powtórek w sekundach: po błędzie kraj wraca szybko, po każdej
+# poprawnej odpowiedzi z rzędu odstęp rośnie GROWTH razy
+RETRY_INTERVAL = 30.0
+BASE_INTERVAL = 60.0
+GROWTH = 3.0
+# Pokazany kraj nie wraca wcześniej niż po tylu sekundach (chyba że nie ma innych)
+SHOWN_COOLDOWN = 60.0
+# Ile sekund wcześniej przypada kraj z odsetkiem błędów 100% niż z 0%
+ERROR_WEIGHT = 300.0
+# Kraje bez historii wchodzą do gry co tyle sekund, przeplatane z powtórkami
+NEW_SPACING = 30.0
+
+# Zapis paczkami: najwyżej tyle wierszy albo tyle sekund zbierania
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0
+
+
+def default_path():
+    """Plik postępów w katalogu domowym (wspólny dla wszystkich kopii gry)."""
+    return os.path.join(os.path.expanduser("~"), ".kck", "postepy.sqlite")
+
+
+def connect(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=10)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class Progress:
+    """Statystyki krajów (w pamięci, po pozycjach world_data) i ich zapis w tle."""
+
+    def __init__(self, path, names, clock=time.time):
+        self.path = path
+        self.names = list(names)
+        self.clock = clock
+        self.started = clock()
+
+        count = len(self.names)
+        self.attempts = np.zeros(count, dtype=np.int64)
+        self.errors = np.zeros(count, dtype=np.int64)
+        self.streak = np.zeros(count, dtype=np.int64)
+        self.interval = np.zeros(count)
+        self.due = np.zeros(count)
+        # Kiedy kraj był ostatnio pokazany - tylko w tej sesji, nie w bazie
+        self.shown = np.full(count, -np.inf)
+
+        positions = {name: position for position, name in enumerate(self.names)}
+        connection = connect(path)
+        try:
+            rows = connection.execute(
+                "SELECT country, attempts, errors, streak, interval, due FROM country_stats").fetchall()
+        finally:
+            connection.close()
+        for country, attempts, errors, streak, interval, due in rows:
+            # Kraje spoza bieżących danych (inna warstwa, zmiana nazwy) są pomijane
+            position = positions.get(country)
+            if position is not None:
+                self.attempts[position] = attempts
+                self.errors[position] = errors
+                self.streak[position] = streak
+                self.interval[position] = interval
+                self.due[position] = due
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="progress", daemon=True)
+        self._writer.start()
+
+    def totals(self):
+        """Liczba wszystkich odpowiedzi i poprawnych w całej historii profilu."""
+        attempts = int(self.attempts.sum())
+        return attempts, attempts - int(self.errors.sum())
+
+    def priority(self, index, new_rank=0):
+        """Klucz kopca: termin powtórki minus waga odsetka błędów (mniejszy - wcześniej).
+
+        Kraj bez historii przypada `new_rank` odstępów NEW_SPACING po starcie.
+        """
+        if self.attempts[index]:
+            due = self.due[index]
+        else:
+            due = self.started + NEW_SPACING * new_rank
+        # Odsetek błędów wygładzony tak, że nowy kraj ma 50%
+        error_rate = (self.errors[index] + 1) / (self.attempts[index] + 2)
+        return float(due - ERROR_WEIGHT * error_rate)
+
+    def mark_shown(self, index):
+        self.shown[index] = self.clock()
+
+    def record(self, index, correct, kind=None, difficulty=None, mode=None, answered=None):
+        """Uaktualnia statystyki kraju i zleca zapis odpowiedzi (bez czekania na dysk)."""
+        now = self.clock()
+        self.attempts[index] += 1
+        if correct:
+            self.streak[index] += 1
+            self.interval[index] = max(BASE_INTERVAL, self.interval[index] * GROWTH)
+        else:
+            self.errors[index] += 1
+            self.streak[index] = 0
+            self.interval[index] = RETRY_INTERVAL
+        self.due[index] = now + self.interval[index]
+
+        country = self.names[index]
+        self._queue.put((
+            (now, country, difficulty, mode, kind, int(bool(correct)),
+             None if answered is None else self.names[answered]),
+            (country, int(self.attempts[index]), int(self.errors[index]), int(self.streak[index]),
+             float(self.interval[index]), float(self.due[index])),
+        ))
+
+    def _write_loop(self):
+        connection = connect(self.path)
+        closing = False
+        while not closing:
+            batch = [self._queue.get()]
+            # Kolejne odpowiedzi z krótkiego okna trafiają do tej samej transakcji
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while batch[-1] is not None and len(batch) < BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            closing = batch[-1] is None
+            rows = [item for item in batch if item is not None]
+            try:
+                if rows:
+                    with connection:
+                        connection.executemany(
+                            "INSERT INTO attempts (time, country, difficulty, mode, kind, correct, answered) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)", [attempt for attempt, _ in rows])
+                        connection.executemany(
+                            "INSERT OR REPLACE INTO country_stats "
+                            "(country, attempts, errors, streak, interval, due) VALUES (?, ?, ?, ?, ?, ?)",
+                            [stats for _, stats in rows])
+            except sqlite3.Error as e:
+                # Błąd zapisu nie może zatrzymać gry - tracimy tylko tę paczkę
+                print(f"Nie udało się zapisać postępów: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+    def flush(self):
+        """Czeka, aż wszystkie zlecone odpowiedzi trafią do bazy."""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+
+class ReviewQueue:
+    """Kopiec krajów poziomu trudności uporządkowany według Progress.priority.
+
+    Kraje pokazane przed chwilą czekają w osobnym kopcu (według końca
+    SHOWN_COOLDOWN) i wracają do głównego z aktualnym kluczem. Zmiana statystyk
+    kraju dokłada nowy wpis (update), a nieaktualne wpisy są usuwane leniwie,
+    gdy dotrą na szczyt - wybór i aktualizacja kosztują O(log n).
+    """
+
+    def __init__(self, positions, progress, rng):
+        self.progress = progress
+        order = [int(position) for position in positions]
+        # Losowa kolejność wprowadzania krajów bez historii (i rozstrzygania remisów)
+        rng.shuffle(order)
+        self._new_rank = {index: rank for rank, index in enumerate(order)}
+        self._counter = itertools.count()
+        self._latest = {}
+        self._heap = []
+        self._cooling = []
+        for index in order:
+            self._latest[index] = next(self._counter)
+            self._heap.append((self._priority(index), self._latest[index], index))
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self._latest)
+
+    def _priority(self, index):
+        return self.progress.priority(index, self._new_rank[index])
+
+    def update(self, index):
+        """Ponownie ustawia kraj w kolejce po zmianie jego statystyk (lub po pokazaniu)."""
+        if index not in self._latest:
+            return
+        counter = self._latest[index] = next(self._counter)
+        release = self.progress.shown[index] + SHOWN_COOLDOWN
+        if release > self.progress.clock():
+            heapq.heappush(self._cooling, (release, counter, index))
+        else:
+            heapq.heappush(self._heap, (self._priority(index), counter, index))
+
+        if len(self._heap) + len(self._cooling) > 4 * len(self._latest):
+            # Zbyt wiele nieaktualnych wpisów - przebudowa z samych aktualnych
+            for heap in (self._heap, self._cooling):
+                heap[:] = [entry for entry in heap if self._latest[entry[2]] == entry[1]]
+                heapq.heapify(heap)
+
+    def _release(self):
+        now = self.progress.clock()
+        while self._cooling and self._cooling[0][0] <= now:
+            _, counter, index = heapq.heappop(self._cooling)
+            if self._latest[index] == counter:
+                counter = self._latest[index] = next(self._counter)
+                heapq.heappush(self._heap, (self._priority(index), counter, index))
+
+    def _top(self, heap, exclude=None):
+        """Aktualny wpis o najmniejszym kluczu; `exclude` pomijany, jeśli jest inny kandydat."""
+        while heap and self._latest[heap[0][2]] != heap[0][1]:
+            heapq.heappop(heap)
+        if not heap:
+            return None
+        index = heap[0][2]
+        if index != exclude:
+            return index
+        entry = heapq.heappop(heap)
+        other = self._top(heap)
+        heapq.heappush(heap, entry)
+        return other
+
+    def draw(self, exclude=None):
+        """Kraj o najmniejszym kluczu (pozostaje w kolejce do następnego update).
+
+        `exclude` to zwykle kraj poprzedniej rundy - wraca tylko, gdy nie ma innych.
+        """
+        self._release()
+        index = self._top(self._heap, exclude)
+        if index is None:
+            # Wszystkie kraje pokazano przed chwilą - ten, który czeka najdłużej
+            index = self._top(self._cooling, exclude)
+        if index is None and exclude in self._latest:
+            index = exclude
+        return index
+
+    def put_back(self, index):
+        """Jak ShuffledDeck.put_back - draw nie zdejmuje kraju z kolejki, więc nie ma czego oddawać."""
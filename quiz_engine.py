@@ -0,0 +1,316 @@
+"""Logika quizu niezależna od Tk i matplotlib.
+
+QuizEngine trzyma dane, losuje kraje według poziomu trudności i liczy punkty.
+GeographyApp jest tylko widokiem nad nim, a ten sam silnik można uruchomić
+bez ekranu (symulacje, serwer, benchmarki).
+"""
+import copy
+import random
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from answer_index import AnswerIndex, EXACT, OTHER, TYPO, UNKNOWN
+
+DIFFICULTIES = ('world', 'europe', 'asia', 'africa', 'americas', 'oceania')
+
+# Kontynenty należące do poziomu trudności (None - cały świat)
+DIFFICULTY_CONTINENTS = {
+    'world': None,
+    'europe': ("Europe",),
+    'asia': ("Asia",),
+    'africa': ("Africa",),
+    'americas': ("North America", "South America"),
+    'oceania': ("Oceania",),
+}
+
+# Liczba odpowiedzi do wyboru w trybie "wybór z listy" (właściwa i sąsiedzi)
+CHOICE_COUNT = 4
+
+# Wynik sprawdzenia odpowiedzi: rodzaj dopasowania (answer_index), czy zaliczona,
+# numer właściwego kraju i numer kraju, który gracz wpisał (jeśli rozpoznany)
+AnswerResult = namedtuple("AnswerResult", ["kind", "correct", "country", "answered_country"])
+
+
+def build_difficulty_index(world_data):
+    """Pozycje wierszy world_data dla każdego poziomu trudności (liczone raz)."""
+    index = {}
+    for difficulty, continents in DIFFICULTY_CONTINENTS.items():
+        if continents is None or len(world_data) == 0:
+            index[difficulty] = np.arange(len(world_data))
+        else:
+            index[difficulty] = np.flatnonzero(world_data['continent'].isin(continents).to_numpy())
+    return index
+
+
+class ShuffledDeck:
+    """Talia pozycji krajów: tasowana raz na cykl, bez powtórzeń w obrębie cyklu."""
+
+    def __init__(self, positions, rng):
+        self.positions = np.array(positions)
+        self.rng = rng
+        self._order = []
+        self._next = 0
+        self._last = None
+        self._before_last = None
+
+    def __len__(self):
+        return len(self.positions)
+
+    def draw(self):
+        if len(self.positions) == 0:
+            return None
+        if self._next >= len(self._order):
+            self._order = self.positions.tolist()
+            self.rng.shuffle(self._order)
+            # Nowy cykl nie zaczyna się od kraju, którym skończył się poprzedni
+            if len(self._order) > 1 and self._order[0] == self._last:
+                self._order[0], self._order[-1] = self._order[-1], self._order[0]
+            self._next = 0
+        self._before_last = self._last
+        self._last = self._order[self._next]
+        self._next += 1
+        return self._last
+
+    def put_back(self, index):
+        """Oddaje ostatnio wyciągnięty kraj - następne draw zwróci go ponownie."""
+        if self._next > 0 and self._order[self._next - 1] == index:
+            self._next -= 1
+            self._last = self._before_last
+
+
+class QuizEngine:
+    def __init__(self, world_data, viewports=None, answer_index=None, rng=None, difficulty_index=None,
+                 locator=None, progress=None, adjacency=None):
+        self.world_data = world_data
+        if viewports is None:
+            from viewports import build_viewport_index
+            viewports = build_viewport_index(world_data)
+        self.viewports = viewports
+        self.answer_index = answer_index or AnswerIndex.from_world_data(world_data)
+        self.difficulty_index = difficulty_index or build_difficulty_index(world_data)
+        # Struktury budowane leniwie i współdzielone przez wszystkie sesje (new_session)
+        self._shared = {'locator': locator, 'adjacency': adjacency, 'region_views': {}}
+        # Trwałe postępy gracza (progress.Progress) - z nimi kraje wybiera ReviewQueue
+        self.progress = progress
+        self.rng = rng or random.Random()
+        self._reset_session()
+
+    def _reset_session(self):
+        self.score = 0
+        self.attempts = 0
+        self.current_difficulty = "world"
+        self.current_index = None
+        self._decks = {}
+        # Kraj wybrany z wyprzedzeniem (poziom trudności, pozycja) - patrz peek_next
+        self._next = None
+
+    def new_session(self, rng=None):
+        """Nowa sesja gracza współdzieląca dane i indeksy z tym silnikiem."""
+        session = copy.copy(self)
+        session.rng = rng or random.Random()
+        session._reset_session()
+        return session
+
+    @property
+    def locator(self):
+        """Indeks przestrzenny do trybu "wskaż na mapie" (budowany przy pierwszym użyciu)."""
+        if self._shared['locator'] is None:
+            from hit_test import CountryLocator
+            self._shared['locator'] = CountryLocator(self.world_data.geometry.values)
+        return self._shared['locator']
+
+    @property
+    def adjacency(self):
+        """Graf sąsiedztwa do trybu "wybór z listy" (liczony przy pierwszym użyciu, jeśli nie podano)."""
+        if self._shared['adjacency'] is None:
+            from adjacency import AdjacencyGraph
+            self._shared['adjacency'] = AdjacencyGraph.from_world_data(self.world_data)
+        return self._shared['adjacency']
+
+    def set_difficulty(self, difficulty):
+        self.current_difficulty = difficulty if difficulty in self.difficulty_index else "world"
+        if self._next is not None and self._next[0] != self.current_difficulty:
+            self._cancel_peek()
+
+    @property
+    def current_country(self):
+        if self.current_index is None:
+            return None
+        return self.world_data.iloc[self.current_index]
+
+    def get_filtered_positions(self):
+        return self.difficulty_index[self.current_difficulty]
+
+    def get_filtered_countries(self):
+        return self.world_data.iloc[self.get_filtered_positions()]
+
+    def _deck(self):
+        deck = self._decks.get(self.current_difficulty)
+        if deck is None:
+            if self.progress is not None:
+                from progress import ReviewQueue
+                deck = ReviewQueue(self.get_filtered_positions(), self.progress, self.rng)
+            else:
+                deck = ShuffledDeck(self.get_filtered_positions(), self.rng)
+            self._decks[self.current_difficulty] = deck
+        return deck
+
+    def _draw(self, previous=None):
+        if self.progress is None:
+            return self._deck().draw()
+        return self._deck().draw(exclude=previous)
+
+    def _mark_shown(self, index):
+        if self.progress is not None and index is not None:
+            # Pokazany kraj odsuwa się w kolejkach wszystkich poziomów trudności
+            self.progress.mark_shown(index)
+            self._update_decks(index)
+
+    def _update_decks(self, index):
+        for deck in self._decks.values():
+            deck.update(index)
+
+    def _record(self, kind, correct, answered, mode):
+        self.attempts += 1
+        if correct:
+            self.score += 1
+        if self.progress is not None:
+            self.progress.record(self.current_index, correct, kind, self.current_difficulty, mode, answered)
+            self._update_decks(self.current_index)
+
+    def peek_next(self):
+        """Wybiera kraj następnej rundy z wyprzedzeniem (np. do renderowania w tle).
+
+        Wybór jest ważny tylko dla bieżącego poziomu trudności - po jego zmianie
+        kraj wraca do talii, a start_round losuje od nowa. Kraj jest oznaczany
+        jako pokazany dopiero w start_round.
+        """
+        if self._next is not None and self._next[0] != self.current_difficulty:
+            self._cancel_peek()
+        if self._next is None:
+            self._next = (self.current_difficulty, self._draw(self.current_index))
+        return self._next[1]
+
+    def _cancel_peek(self):
+        difficulty, index = self._next
+        self._next = None
+        deck = self._decks.get(difficulty)
+        if deck is not None and index is not None:
+            deck.put_back(index)
+
+    def start_round(self):
+        """Losuje kraj na nową rundę; zwraca jego pozycję w world_data albo None."""
+        if self._next is not None and self._next[0] != self.current_difficulty:
+            self._cancel_peek()
+        if self._next is not None:
+            self.current_index = self._next[1]
+            self._next = None
+        else:
+            self.current_index = self._draw(self.current_index)
+        self._mark_shown(self.current_index)
+        return self.current_index
+
+    def current_view(self):
+        return self.viewports[self.current_index]
+
+    def region_view(self):
+        """Widok obejmujący wszystkie kraje bieżącego poziomu trudności."""
+        region_views = self._shared['region_views']
+        view = region_views.get(self.current_difficulty)
+        if view is None:
+            from viewports import cluster_bounds
+            bounds = np.array([cluster_bounds(geom) for geom in
+                               self.world_data.geometry.values[self.get_filtered_positions()]])
+            bounds = bounds[np.isfinite(bounds).all(axis=1)]
+            if len(bounds) == 0:
+                return None
+            view = region_views[self.current_difficulty] = (
+                bounds[:, 0].min(), bounds[:, 1].min(), bounds[:, 2].max(), bounds[:, 3].max())
+        return view
+
+    def check_answer(self, user_answer):
+        """Sprawdza odpowiedź w bieżącej rundzie i aktualizuje punktację."""
+        match = self.answer_index.check(user_answer, self.current_index)
+        correct = match.kind in (EXACT, TYPO)
+        self._record(match.kind, correct, match.country, "name")
+
+        return AnswerResult(match.kind, correct, self.current_index, match.country)
+
+    def check_location(self, x, y):
+        """Tryb "wskaż na mapie": sprawdza kliknięcie w punkcie (x, y) mapy."""
+        clicked = self.locator.locate(x, y)
+        if clicked is None:
+            kind = UNKNOWN
+        else:
+            kind = EXACT if clicked == self.current_index else OTHER
+        correct = kind == EXACT
+        self._record(kind, correct, clicked, "locate")
+
+        return AnswerResult(kind, correct, self.current_index, clicked)
+
+    def choices(self, count=CHOICE_COUNT):
+        """Pozycje krajów do wyboru w bieżącej rundzie: właściwy i jego sąsiedzi, w losowej kolejności."""
+        options = [self.current_index] + self.adjacency.distractors(self.current_index, count - 1, self.rng)
+        self.rng.shuffle(options)
+        return options
+
+    def check_choice(self, index):
+        """Tryb "wybór z listy": sprawdza wybrany kraj (pozycję z choices)."""
+        kind = EXACT if index == self.current_index else OTHER
+        correct = kind == EXACT
+        self._record(kind, correct, index, "choice")
+
+        return AnswerResult(kind, correct, self.current_index, index)
+
+    def accuracy(self):
+        return int((self.score / self.attempts) * 100) if self.attempts > 0 else 0
+
+    def display_name(self, index):
+        """Nazwa kraju do wyświetlenia: pierwsza z pakietu języka (albo oryginalna, jeśli jej brak)"""
+        country = self.world_data.iloc[index]
+        alt_names = country['alt_names']
+        # Ostatnia nazwa alternatywna to oryginalna, małymi literami - przed nią są nazwy z pakietu
+        if len(alt_names) > 1:
+            return alt_names[0]
+        return country['name']
+
+
+def synthetic_answer(engine, rng, accuracy=0.7):
+    """Odpowiedź wirtualnego gracza: poprawna, nazwa innego kraju albo bzdura."""
+    roll = rng.random()
+    if roll < accuracy:
+        return rng.choice(engine.current_country['alt_names'])
+    if roll < accuracy + (1 - accuracy) / 2:
+        other = engine.world_data.iloc[rng.randrange(len(engine.world_data))]
+        return rng.choice(other['alt_names'])
+    return "".join(rng.choice("abcdefghijklmnoprstuwyz") for _ in range(rng.randint(4, 12)))
+
+
+def simulate_sessions(engine, sessions, rounds, seed=0, difficulties=DIFFICULTIES):
+    """Rozgrywa `sessions` sesji po `rounds` rund i zwraca statystyki przepustowości."""
+    rng = random.Random(seed)
+    kinds = dict.fromkeys((EXACT, TYPO, OTHER, UNKNOWN), 0)
+    played = 0
+
+    start = time.perf_counter()
+    for session_number in range(sessions):
+        session = engine.new_session(random.Random(rng.random()))
+        session.set_difficulty(difficulties[session_number % len(difficulties)])
+        for _ in range(rounds):
+            if session.start_round() is None:
+                break
+            session.current_view()
+            result = session.check_answer(synthetic_answer(session, rng))
+            kinds[result.kind] += 1
+            played += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "sessions": sessions,
+        "rounds": played,
+        "seconds": elapsed,
+        "rounds_per_second": played / elapsed if elapsed > 0 else float("inf"),
+        "results": kinds,
+    }
@@ -0,0 +1,442 @@
+"""Serwer HTTP quizu dla wielu graczy naraz (np. cała klasa w przeglądarkach).
+
+Serwer działa na asyncio i korzysta z tych samych danych i tej samej punktacji
+co aplikacja okienkowa (QuizEngine); każdy gracz ma własną sesję w pamięci
+(QuizEngine.new_session). Obrazy rund pochodzą z pamięci podręcznej LRU,
+ewentualnie z katalogu prerender.py, a brakujące są renderowane w puli
+procesów o ograniczonym rozmiarze - pętla zdarzeń nigdy nie czeka na matplotlib.
+
+API (JSON):
+    POST /api/session                 {"difficulty": "europe"} -> {"session": ...}
+    POST /api/session/<id>/round      nowa runda -> {"round": n, "image": url}
+    GET  /api/session/<id>/image      obraz bieżącej rundy (PNG)
+    POST /api/session/<id>/answer     {"answer": "Polska"} -> wynik i punktacja
+    GET  /api/stats                   liczba sesji, trafienia pamięci obrazów
+
+Uruchomienie z katalogu głównego projektu:
+    python quiz_server.py --port 8080 --jobs 4
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import secrets
+import signal
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+from answer_index import EXACT, OTHER, TYPO
+from perf import memory_usage, span, spans
+from quiz_engine import DIFFICULTIES, QuizEngine
+
+# Sesja bez żadnego zapytania przez tyle sekund jest usuwana
+SESSION_TTL = 3600
+MAX_SESSIONS = 5000
+# Ile obrazów PNG trzymamy w pamięci
+IMAGE_CACHE_SIZE = 256
+MAX_BODY_SIZE = 16 * 1024
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+               503: "Service Unavailable"}
+
+INDEX_HTML = """<!DOCTYPE html>
+<html lang="pl"><head><meta charset="utf-8"><title>Geografia - Rozpoznaj Kraj</title>
+<style>body{font-family:sans-serif;background:#f5f5f5;margin:2em}img{max-width:100%}</style></head>
+<body><h1>Geografia - Rozpoznaj Kraj</h1>
+<p>Poziom: <select id="difficulty">%(options)s</select> <button id="start">Nowa gra</button>
+<span id="score"></span></p>
+<p><img id="map" alt=""></p>
+<form id="form"><input id="answer" autocomplete="off"> <button>Sprawdź</button>
+<button type="button" id="next">Następny kraj</button></form>
+<p id="feedback"></p>
+<script>
+let session = null;
+const $ = id => document.getElementById(id);
+async function post(url, data) {
+  const response = await fetch(url, {method: "POST", body: JSON.stringify(data || {})});
+  return response.json();
+}
+async function nextRound() {
+  const round = await post(`/api/session/${session}/round`);
+  $("map").src = round.image; $("answer").value = ""; $("feedback").textContent = "";
+  $("answer").focus();
+}
+$("start").onclick = async () => {
+  session = (await post("/api/session", {difficulty: $("difficulty").value})).session;
+  nextRound();
+};
+$("next").onclick = nextRound;
+$("form").onsubmit = async event => {
+  event.preventDefault();
+  const result = await post(`/api/session/${session}/answer`, {answer: $("answer").value});
+  $("feedback").textContent = result.message || result.error;
+  if (result.score !== undefined)
+    $("score").textContent = `Wynik: ${result.score}/${result.attempts} (${result.accuracy}%%)`;
+};
+</script></body></html>
+"""
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class LRUCache:
+    """Pamięć obrazów: najdawniej używane wypadają po przekroczeniu rozmiaru."""
+
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        value = self._items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+
+class PlayerSession:
+    def __init__(self, engine):
+        self.engine = engine
+        self.round = 0
+        self.answered = True
+        self.last_seen = time.monotonic()
+
+
+class QuizServer:
+    def __init__(self, engine, render_executor, render_slots, image_cache_size=IMAGE_CACHE_SIZE,
+                 image_cache=None, image_size=None):
+        self.engine = engine
+        self.sessions = {}
+        self.images = LRUCache(image_cache_size)
+        # Obrazy z prerender.py (opcjonalnie) - czytane z dysku przed renderowaniem
+        self.image_cache = image_cache
+        self.image_size = image_size
+        self.render_executor = render_executor
+        # Ogranicza liczbę zleceń czekających na pulę procesów
+        self.render_slots = asyncio.Semaphore(render_slots)
+        # Trwające renderowania - kilku graczy czekających na ten sam kraj dzieli jedno
+        self._rendering = {}
+        self.renders = 0
+
+    # --- obrazy ---
+
+    async def image(self, index):
+        """PNG kraju: z pamięci, z katalogu prerender.py albo renderowany w puli procesów."""
+        data = self.images.get(index)
+        if data is not None:
+            return data
+        return await asyncio.shield(self._image_task(index))
+
+    def _image_task(self, index):
+        task = self._rendering.get(index)
+        if task is None:
+            task = self._rendering[index] = asyncio.ensure_future(self._load_image(index))
+
+            def finished(task):
+                del self._rendering[index]
+                if not task.cancelled():
+                    task.exception()  # błąd dostanie gracz czekający na obraz
+
+            task.add_done_callback(finished)
+        return task
+
+    async def _load_image(self, index):
+        loop = asyncio.get_running_loop()
+        data = None
+        if self.image_cache is not None:
+            data = await loop.run_in_executor(None, self.image_cache.read_bytes, index, self.image_size)
+        if data is None:
+            import prerender
+            async with self.render_slots:
+                data = await loop.run_in_executor(self.render_executor, prerender.render_png, index)
+            self.renders += 1
+        self.images.put(index, data)
+        return data
+
+    # --- sesje ---
+
+    def create_session(self, difficulty):
+        if len(self.sessions) >= MAX_SESSIONS:
+            self.expire_sessions()
+            if len(self.sessions) >= MAX_SESSIONS:
+                raise HTTPError(503, "Za dużo aktywnych sesji")
+        session_id = secrets.token_urlsafe(12)
+        player = PlayerSession(self.engine.new_session())
+        player.engine.set_difficulty(difficulty)
+        self.sessions[session_id] = player
+        return session_id
+
+    def get_session(self, session_id):
+        player = self.sessions.get(session_id)
+        if player is None:
+            raise HTTPError(404, "Nie ma takiej sesji")
+        player.last_seen = time.monotonic()
+        return player
+
+    def expire_sessions(self):
+        deadline = time.monotonic() - SESSION_TTL
+        for session_id in [sid for sid, player in self.sessions.items() if player.last_seen < deadline]:
+            del self.sessions[session_id]
+
+    async def expire_sessions_periodically(self, interval=60):
+        while True:
+            await asyncio.sleep(interval)
+            self.expire_sessions()
+
+    # --- obsługa zapytań ---
+
+    async def dispatch(self, method, target, body):
+        """Zwraca (status, typ treści, treść) dla zapytania."""
+        path = urlsplit(target).path.strip("/").split("/")
+
+        if path == [""]:
+            options = "".join(f'<option value="{d}">{d}</option>' for d in DIFFICULTIES)
+            return 200, "text/html; charset=utf-8", (INDEX_HTML % {"options": options}).encode("utf-8")
+        if path == ["api", "stats"]:
+            return self._json({
+                "sessions": len(self.sessions),
+                "images_cached": len(self.images),
+                "image_hits": self.images.hits,
+                "image_misses": self.images.misses,
+                "renders": self.renders,
+                "latency": spans.summary(),
+                "memory": memory_usage(),
+            })
+        if path == ["api", "session"]:
+            self._require(method, "POST")
+            difficulty = self._string_field(self._json_body(body), "difficulty", "world")
+            return self._json({"session": self.create_session(difficulty)})
+        if len(path) == 4 and path[:2] == ["api", "session"]:
+            player = self.get_session(path[2])
+            action = path[3]
+            if action == "round":
+                self._require(method, "POST")
+                return self._json(self.start_round(path[2], player))
+            if action == "image":
+                self._require(method, "GET")
+                if player.engine.current_index is None:
+                    raise HTTPError(409, "Runda nie została rozpoczęta")
+                return 200, "image/png", await self.image(player.engine.current_index)
+            if action == "answer":
+                self._require(method, "POST")
+                return self._json(self.check_answer(player, self._string_field(self._json_body(body), "answer", "")))
+        raise HTTPError(404, "Nie ma takiej strony")
+
+    def start_round(self, session_id, player):
+        index = player.engine.start_round()
+        if index is None:
+            raise HTTPError(409, "Brak krajów dla wybranego poziomu trudności")
+        player.round += 1
+        player.answered = False
+        # Obraz zaczyna się przygotowywać, zanim przeglądarka o niego poprosi
+        if index not in self.images:
+            self._image_task(index)
+        return {"round": player.round, "image": f"/api/session/{session_id}/image?round={player.round}"}
+
+    def check_answer(self, player, answer):
+        """Ta sama punktacja co w oknie gry (QuizEngine.check_answer), raz na rundę."""
+        engine = player.engine
+        if engine.current_index is None:
+            raise HTTPError(409, "Runda nie została rozpoczęta")
+        if player.answered:
+            raise HTTPError(409, "Odpowiedź w tej rundzie już padła")
+
+        result = engine.check_answer(answer)
+        # Dopiero sprawdzona odpowiedź zużywa rundę - po błędzie gracz może spróbować ponownie
+        player.answered = True
+        correct_name = engine.display_name(result.country)
+        if result.kind == EXACT:
+            message = "Poprawna odpowiedź!"
+        elif result.kind == TYPO:
+            message = f"Poprawna odpowiedź! (pisownia: {correct_name})"
+        elif result.kind == OTHER:
+            message = f"Niestety, to nie {engine.display_name(result.answered_country)}, to jest {correct_name}"
+        else:
+            message = f"Niestety, to jest {correct_name}"
+        return {
+            "kind": result.kind,
+            "correct": result.correct,
+            "country": correct_name,
+            "message": message,
+            "score": engine.score,
+            "attempts": engine.attempts,
+            "accuracy": engine.accuracy(),
+        }
+
+    @staticmethod
+    def _span_name(method, target):
+        # Tylko znane końcówki - dowolne ścieżki nie mogą mnożyć nazw odcinków
+        action = urlsplit(target).path.rstrip("/").rsplit("/", 1)[-1]
+        if action not in ("session", "round", "image", "answer", "stats"):
+            action = "inne"
+        return f"http {method if method in ('GET', 'POST') else 'inne'} {action}"
+
+    @staticmethod
+    def _require(method, expected):
+        if method != expected:
+            raise HTTPError(405, f"Dozwolona metoda: {expected}")
+
+    @staticmethod
+    def _json_body(body):
+        if not body:
+            return {}
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise HTTPError(400, "Niepoprawny JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Oczekiwano obiektu JSON")
+        return data
+
+    @staticmethod
+    def _string_field(data, name, default):
+        value = data.get(name, default)
+        if not isinstance(value, str):
+            raise HTTPError(400, f"Pole {name} musi być napisem")
+        return value
+
+    @staticmethod
+    def _json(data, status=200):
+        return status, "application/json; charset=utf-8", json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    # --- HTTP/1.1 z keep-alive ---
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    method, target, version = "", "", "HTTP/1.0"
+                try:
+                    if not method:
+                        raise HTTPError(400, "Niepoprawne zapytanie")
+                    length = int(headers.get("content-length") or 0)
+                    if length > MAX_BODY_SIZE:
+                        raise HTTPError(413, "Za duże zapytanie")
+                    body = await reader.readexactly(length) if length else b""
+                    with span(self._span_name(method, target)):
+                        status, content_type, payload = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, content_type, payload = self._json({"error": str(e)}, e.status)
+                except ValueError:
+                    status, content_type, payload = self._json({"error": "Niepoprawne zapytanie"}, 400)
+                    version = "HTTP/1.0"
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    raise
+                except Exception as e:
+                    # Błąd w obsłudze zapytania nie może zerwać połączenia bez odpowiedzi
+                    print(f"Błąd obsługi {method} {target}: {e!r}", file=sys.stderr)
+                    status, content_type, payload = self._json({"error": "Błąd serwera"}, 500)
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write((
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Cache-Control: no-store\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                ).encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(engine, host, port, jobs, shapefile_path, image_size, image_cache_dir=None,
+                image_cache_size=IMAGE_CACHE_SIZE):
+    import prerender
+
+    dpi = prerender.DEFAULT_DPI
+    image_cache = None
+    if image_cache_dir is not None:
+        image_cache = prerender.ImageCache(image_cache_dir, engine.world_data, engine.viewports)
+        image_cache.keys(image_size, dpi)
+
+    with ProcessPoolExecutor(jobs, initializer=prerender.init_worker,
+                             initargs=(shapefile_path, image_size, dpi)) as executor:
+        quiz = QuizServer(engine, executor, render_slots=jobs * 2, image_cache_size=image_cache_size,
+                          image_cache=image_cache, image_size=image_size)
+        server = await asyncio.start_server(quiz.handle_connection, host, port, backlog=1024)
+        expiry = asyncio.ensure_future(quiz.expire_sessions_periodically())
+        print(f"Serwer quizu: http://{host}:{port}/ (procesy renderujące: {jobs})", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            expiry.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="liczba procesów renderujących obrazy")
+    parser.add_argument("--size", default="1000x600", help="rozmiar obrazów w pikselach")
+    parser.add_argument("--cache-size", type=int, default=IMAGE_CACHE_SIZE,
+                        help="ile obrazów trzymać w pamięci")
+    parser.add_argument("--image-cache", nargs="?", const="", metavar="KATALOG",
+                        help="korzystaj z obrazów przygotowanych przez prerender.py")
+    parser.add_argument("--shapefile", help="plik shapefile (domyślnie ten sam co w grze)")
+    args = parser.parse_args()
+
+    import geo_data
+    import prerender
+
+    shapefile_path = args.shapefile or geo_data.find_shapefile()
+    if shapefile_path is None:
+        sys.exit("Nie znaleziono pliku z danymi geograficznymi")
+    engine = QuizEngine(geo_data.load_world_data(shapefile_path))
+
+    image_cache_dir = args.image_cache
+    if image_cache_dir == "":
+        image_cache_dir = prerender.default_cache_dir(shapefile_path)
+
+    # SIGTERM kończy serwer tak jak Ctrl+C - razem z procesami renderującymi
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve(engine, args.host, args.port, max(1, args.jobs), shapefile_path,
+                          prerender.parse_size(args.size), image_cache_dir, args.cache_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Lekki renderer mapy na zwykłym tk.Canvas (bez matplotlib).
+
+Pierścienie wszystkich krajów są raz przeliczane na płaskie listy współrzędnych
+(x = długość, y = -szerokość, bo oś y ekranu rośnie w dół) i rysowane jako
+natywne wielokąty Tk. Zmiana widoku to tylko przekształcenie istniejących
+elementów przez canvas.scale i canvas.move - nic nie jest rysowane od nowa,
+a podświetlenie zmienia jedynie kolory elementów jednego kraju. Dzięki temu
+klatka animowanego przejścia (zoom.ZoomAnimator) to po prostu set_view.
+
+Interfejs jest taki sam jak w MapRenderer, więc GeographyApp może używać
+obu (opcja --renderer tk).
+"""
+import tkinter as tk
+
+import numpy as np
+import shapely
+
+from perf import span
+from viewports import is_geographic
+
+# Te same kolory co WORLD_STYLE i HIGHLIGHT_STYLE w map_renderer (bez importu matplotlib)
+BACKGROUND = "white"
+WORLD_FILL = "#e0e0e0"
+WORLD_OUTLINE = "#c0c0c0"
+WORLD_WIDTH = 1
+HIGHLIGHT_FILL = "#66b3ff"
+HIGHLIGHT_OUTLINE = "#0066cc"
+HIGHLIGHT_WIDTH = 1.5
+
+
+def flat_ring(coords, scale=(1.0, 1.0), offset=(0.0, 0.0)):
+    """Pierścień jako płaska lista x0, y0, x1, y1... z osią y skierowaną w dół.
+
+    Ze `scale` i `offset` od razu w pikselach bieżącego widoku.
+    """
+    flat = np.empty(2 * len(coords))
+    flat[0::2] = coords[:, 0] * scale[0] + offset[0]
+    flat[1::2] = -coords[:, 1] * scale[1] + offset[1]
+    return flat.tolist()
+
+
+class TkCanvasRenderer:
+    """Mapa z natywnych wielokątów Tk; widok zmieniany przekształceniem, nie rysowaniem."""
+
+    # Przedrostek nazw odcinków w pomiarach (perf.spans)
+    span_name = "rysowanie"
+
+    def __init__(self, master):
+        self.canvas = tk.Canvas(master, bg=BACKGROUND, highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+
+        self.geographic = False
+        # Kraje z dziurami i kraje leżące w dziurach innych (Lesotho w RPA)
+        self.countries_with_holes = set()
+        self.inner_countries = {}
+
+        # Bieżące przekształcenie: ekran = współrzędne bazowe * skala + przesunięcie
+        self._scale = (1.0, 1.0)
+        self._offset = (0.0, 0.0)
+        self._view = None
+        self._highlight_index = None
+        self._click_callback = None
+
+        self.canvas.bind("<Configure>", self._on_resize)
+        self.canvas.bind("<Button-1>", self._on_click)
+
+    def set_world(self, world_data, lod_levels=None):
+        """Tworzy elementy Tk dla wszystkich krajów (raz, po załadowaniu danych).
+
+        `lod_levels` jest pomijane - ten renderer nie ma trybu lod.
+        """
+        self.canvas.delete("all")
+        self._scale = (1.0, 1.0)
+        self._offset = (0.0, 0.0)
+        self._highlight_index = None
+        self.geographic = is_geographic(world_data)
+
+        geometries = np.asarray(world_data.geometry.values)
+        holes, hole_owners = [], []
+        for index, geom in enumerate(geometries):
+            if geom is None or geom.is_empty:
+                continue
+            for polygon in shapely.get_parts(geom):
+                if polygon.geom_type != 'Polygon' or polygon.is_empty:
+                    continue
+                self.canvas.create_polygon(flat_ring(np.asarray(polygon.exterior.coords)),
+                                           fill=WORLD_FILL, outline=WORLD_OUTLINE, width=WORLD_WIDTH,
+                                           tags=("world", f"c{index}"))
+                for ring in polygon.interiors:
+                    holes.append(ring)
+                    hole_owners.append(index)
+
+        # Tk nie wycina dziur w wielokątach - rysujemy je kolorem tła nad krajami
+        for ring, owner in zip(holes, hole_owners):
+            self.canvas.create_polygon(flat_ring(np.asarray(ring.coords)), fill=BACKGROUND,
+                                       outline=WORLD_OUTLINE, width=WORLD_WIDTH, tags=("world", f"h{owner}"))
+        self.countries_with_holes = set(hole_owners)
+
+        # Kraje leżące w dziurach muszą być nad nimi
+        self.inner_countries = {}
+        if holes:
+            tree = shapely.STRtree([shapely.Polygon(ring) for ring in holes])
+            countries, hole_index = tree.query(geometries, predicate='intersects')
+            for country, hole in zip(countries.tolist(), hole_index.tolist()):
+                owner = hole_owners[hole]
+                # Właściciel dziury styka się z nią brzegiem - to nie jest kraj wewnątrz
+                if country != owner:
+                    self.inner_countries.setdefault(owner, []).append(country)
+                    self._raise(country)
+
+        if self._view is not None:
+            self.set_view(self._view)
+
+    def _raise(self, index):
+        self.canvas.tag_raise(f"c{index}")
+        if index in self.countries_with_holes:
+            self.canvas.tag_raise(f"h{index}")
+        for inner in self.inner_countries.get(index, ()):
+            self._raise(inner)
+
+    def show_country(self, index, view=None):
+        """Podświetla kraj o pozycji `index` i ustawia widok (minx, miny, maxx, maxy).
+
+        Bez `view` widok zostaje bez zmian (np. po kliknięciu w trybie "wskaż na mapie").
+        """
+        self._set_highlight(index)
+        self.set_view(view if view is not None else self._view)
+
+    def show_frame(self, index, view, frame):
+        """Gotowe obrazy (prefetch, prerender) są tylko dla renderera matplotlib."""
+        return False
+
+    def show_detail(self, index, geom):
+        """Podmienia podświetlenie kraju `index` na dokładniejszą geometrię (hires.HiresGeometry).
+
+        Elementy kraju z mapy podstawowej dostają kolor tła (maska), a dokładny
+        kształt jest rysowany nad nimi w bieżącym przekształceniu widoku.
+        """
+        if index != self._highlight_index or geom is None:
+            return
+        self.canvas.delete("detail")
+        self.canvas.itemconfigure(f"c{index}", fill=BACKGROUND, outline=BACKGROUND)
+        for polygon in shapely.get_parts(geom):
+            if polygon.geom_type != 'Polygon' or polygon.is_empty:
+                continue
+            self.canvas.create_polygon(flat_ring(np.asarray(polygon.exterior.coords), self._scale, self._offset),
+                                       fill=HIGHLIGHT_FILL, outline=HIGHLIGHT_OUTLINE, width=HIGHLIGHT_WIDTH,
+                                       tags=("world", "detail"))
+            for ring in polygon.interiors:
+                self.canvas.create_polygon(flat_ring(np.asarray(ring.coords), self._scale, self._offset),
+                                           fill=BACKGROUND, outline=HIGHLIGHT_OUTLINE, width=HIGHLIGHT_WIDTH,
+                                           tags=("world", "detail"))
+        # Kraje leżące w dziurach zostają nad dokładnym kształtem
+        for inner in self.inner_countries.get(index, ()):
+            self._raise(inner)
+
+    def _set_highlight(self, index):
+        if index == self._highlight_index:
+            return
+        self.clear_highlight()
+        self._highlight_index = index
+        self.canvas.itemconfigure(f"c{index}", fill=HIGHLIGHT_FILL, outline=HIGHLIGHT_OUTLINE,
+                                  width=HIGHLIGHT_WIDTH)
+        # Obrys podświetlenia nie może być przykryty przez sąsiadów
+        self._raise(index)
+
+    def clear_highlight(self):
+        self.canvas.delete("detail")
+        if self._highlight_index is not None:
+            self.canvas.itemconfigure(f"c{self._highlight_index}", fill=WORLD_FILL, outline=WORLD_OUTLINE,
+                                      width=WORLD_WIDTH)
+            self._highlight_index = None
+
+    def show_world(self, bounds):
+        if bounds is not None:
+            self.set_view(bounds)
+
+    def _aspect(self, center_y):
+        # Tak samo jak MapRenderer: proporcje według szerokości geograficznej środka widoku
+        if not self.geographic:
+            return 1.0
+        return 1 / np.cos(np.radians(np.clip(center_y, -80, 80)))
+
+    def current_view(self):
+        return self._view
+
+    def begin_transition(self, end, frame=None):
+        """Klatki przejścia to zwykłe set_view - nic nie trzeba przygotowywać."""
+        return self._view is not None and self.canvas.winfo_width() > 1
+
+    def transition_frame(self, view):
+        self.set_view(view)
+
+    def end_transition(self):
+        pass
+
+    def set_view(self, view):
+        """Dopasowuje widok do płótna (z zachowaniem proporcji) przez scale i move."""
+        if view is None:
+            return
+        self._view = tuple(float(v) for v in view)
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            # Płótno nie ma jeszcze rozmiaru - widok ustawi _on_resize
+            return
+
+        minx, miny, maxx, maxy = self._view
+        center_x, center_y = (minx + maxx) / 2, (miny + maxy) / 2
+        aspect = self._aspect(center_y)
+        scale = min(width / max(maxx - minx, 1e-9), height / max((maxy - miny) * aspect, 1e-9))
+        scale_x, scale_y = scale, scale * aspect
+        offset_x = width / 2 - center_x * scale_x
+        offset_y = height / 2 + center_y * scale_y
+
+        with span(f"{self.span_name}: tk"):
+            # Względem bieżącego przekształcenia: najpierw skala wokół (0, 0), potem przesunięcie
+            factor_x, factor_y = scale_x / self._scale[0], scale_y / self._scale[1]
+            self.canvas.scale("world", 0, 0, factor_x, factor_y)
+            self.canvas.move("world", offset_x - self._offset[0] * factor_x,
+                             offset_y - self._offset[1] * factor_y)
+            self._scale = (scale_x, scale_y)
+            self._offset = (offset_x, offset_y)
+            self.canvas.update_idletasks()
+
+    def to_data(self, x, y):
+        """Punkt płótna (piksele) w układzie danych (długość, szerokość)."""
+        return (x - self._offset[0]) / self._scale[0], -(y - self._offset[1]) / self._scale[1]
+
+    def connect_click(self, callback):
+        """Wywołuje callback(x, y) ze współrzędnymi danych po kliknięciu w mapę."""
+        self._click_callback = callback
+
+    def _on_click(self, event):
+        if self._click_callback is not None and self._view is not None:
+            self._click_callback(*self.to_data(event.x, event.y))
+
+    def _on_resize(self, event):
+        if self._view is not None:
+            self.set_view(self._view)
@@ -0,0 +1,98 @@
+"""Tabela widoków (przybliżeń) dla każdego kraju liczona raz przy ładowaniu.
+
+Zamiast brać granice całej geometrii (Francja z Gujaną Francuską, Norwegia ze
+Svalbardem, USA z Alaską i Hawajami) kadrujemy główne skupisko poligonów:
+największy poligon i części leżące blisko niego.
+"""
+import numpy as np
+import shapely
+
+# Widok ma rozmiar kraju razy ten współczynnik...
+MARGIN_FACTOR = 3.0
+# ...ale nie mniej niż tyle stopni (małe państwa i wyspy)
+MIN_VIEW_SIZE = 8.0
+# Duże kraje dostają mniejszy margines, żeby nie oglądać pół świata
+LARGE_VIEW_SIZE = 120.0
+LARGE_MARGIN_FACTOR = 1.3
+
+# Część należy do skupiska, jeśli leży nie dalej niż
+# CLUSTER_GAP_FACTOR * rozmiar największego poligonu + CLUSTER_GAP_MIN stopni
+# od którejś z części już do niego należących
+CLUSTER_GAP_FACTOR = 0.15
+CLUSTER_GAP_MIN = 1.0
+
+
+def is_geographic(world_data):
+    """Czy współrzędne to stopnie (proporcje korygowane szerokością geograficzną).
+
+    Dane bez układu współrzędnych (shapefile bez pliku .prj) traktujemy jak
+    płaskie - tak samo w widokach, rendererach i kluczach obrazów.
+    """
+    return bool(world_data.crs is not None and world_data.crs.is_geographic)
+
+
+def _x_scale(center_y, geographic):
+    """Ile "stopni szerokości" ma jeden stopień długości na danej szerokości geograficznej."""
+    if not geographic:
+        return 1.0
+    return float(np.cos(np.radians(np.clip(center_y, -80, 80))))
+
+
+def cluster_bounds(geom, geographic=True):
+    """Granice głównego skupiska poligonów geometrii."""
+    parts = shapely.get_parts(geom)
+    if len(parts) == 0:
+        return np.full(4, np.nan)
+    bounds = shapely.bounds(parts)
+    if len(parts) == 1:
+        return bounds[0]
+
+    dominant = int(np.argmax(shapely.area(parts)))
+    minx, miny, maxx, maxy = bounds[dominant]
+    x_scale = _x_scale((miny + maxy) / 2, geographic)
+    max_gap = CLUSTER_GAP_FACTOR * max((maxx - minx) * x_scale, maxy - miny) + CLUSTER_GAP_MIN
+
+    # Pary części bliższych niż max_gap - rzeczywista odległość kształtów (w skali
+    # ekranu), a nie prostokątów: prostokąt Alaski nachodzi na prostokąt reszty USA
+    scaled = shapely.transform(parts, lambda coords: coords * (x_scale, 1.0))
+    left, right = shapely.STRtree(scaled).query(scaled, predicate='dwithin', distance=max_gap)
+
+    # Dołączamy części bliskie którejkolwiek części skupiska, aż przestanie rosnąć
+    in_cluster = np.zeros(len(parts), dtype=bool)
+    in_cluster[dominant] = True
+    while True:
+        grown = in_cluster.copy()
+        grown[right[in_cluster[left]]] = True
+        if grown.sum() == in_cluster.sum():
+            break
+        in_cluster = grown
+
+    members = bounds[in_cluster]
+    return np.array([members[:, 0].min(), members[:, 1].min(),
+                     members[:, 2].max(), members[:, 3].max()])
+
+
+def view_for_bounds(bounds, geographic=True):
+    """Widok (minx, miny, maxx, maxy) wokół podanych granic, kwadratowy na ekranie."""
+    minx, miny, maxx, maxy = bounds
+    center_x = (minx + maxx) / 2
+    center_y = (miny + maxy) / 2
+    x_scale = _x_scale(center_y, geographic)
+    size = max((maxx - minx) * x_scale, maxy - miny)
+
+    view_size = max(size * MARGIN_FACTOR, MIN_VIEW_SIZE)
+    view_size = min(view_size, max(size * LARGE_MARGIN_FACTOR, LARGE_VIEW_SIZE))
+
+    half_y = view_size / 2
+    half_x = half_y / x_scale
+    return center_x - half_x, center_y - half_y, center_x + half_x, center_y + half_y
+
+
+def build_viewport_index(world_data):
+    """Tablica (n, 4) z widokiem dla każdego kraju, w kolejności wierszy world_data."""
+    geographic = is_geographic(world_data)
+    views = np.empty((len(world_data), 4))
+    for i, geom in enumerate(world_data.geometry.values):
+        bounds = cluster_bounds(geom, geographic)
+        views[i] = view_for_bounds(bounds, geographic) if np.isfinite(bounds).all() else np.nan
+    return views
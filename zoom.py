@@ -0,0 +1,134 @@
+"""Animowane przejścia mapy (przesunięcie i przybliżenie) między widokami.
+
+Klatki są wywoływane przez Tk after() w rytmie ~60 kl./s. Renderer nie rysuje
+w nich mapy od nowa: MapRenderer składa klatkę z gotowych obrazów, a
+TkCanvasRenderer tylko przekształca istniejące elementy. Ostatnia klatka to
+zwykłe wyświetlenie rundy (callback `finish`).
+
+Klatka dłuższa niż budżet albo spóźniona o więcej niż odstęp klatek liczy się
+jako opuszczona. Gdy kolejne przejścia gubią większość klatek (wolny
+komputer), animacje są wyłączane i widok zmienia się skokiem, jak dawniej.
+"""
+import time
+
+from perf import span
+
+# Czas trwania przejścia i odstęp klatek (ok. 60 kl./s), w milisekundach
+DURATION_MS = 350
+FRAME_MS = 16
+# Budżet czasu jednej klatki (ms)
+FRAME_BUDGET_MS = 16
+# Przejście jest "wolne", gdy opuszczono więcej niż taką część klatek...
+MAX_DROPPED_FRACTION = 0.5
+# ...a po tylu wolnych przejściach z rzędu animacje są wyłączane
+SLOW_TRANSITIONS = 2
+
+
+def interpolate_view(start, end, t):
+    """Widok w chwili t (0..1): środek przesuwany liniowo, rozmiar zmieniany geometrycznie.
+
+    Przy geometrycznej zmianie rozmiaru przybliżanie ma stałe tempo (każda
+    klatka powiększa tyle samo razy), a smoothstep łagodzi początek i koniec.
+    """
+    t = min(max(t, 0.0), 1.0)
+    t = t * t * (3 - 2 * t)
+    center_x = (start[0] + start[2]) / 2 * (1 - t) + (end[0] + end[2]) / 2 * t
+    center_y = (start[1] + start[3]) / 2 * (1 - t) + (end[1] + end[3]) / 2 * t
+    sizes = []
+    for low, high in ((0, 2), (1, 3)):
+        start_size = max(start[high] - start[low], 1e-9)
+        end_size = max(end[high] - end[low], 1e-9)
+        sizes.append(start_size * (end_size / start_size) ** t)
+    width, height = sizes
+    return (center_x - width / 2, center_y - height / 2, center_x + width / 2, center_y + height / 2)
+
+
+class ZoomAnimator:
+    """Przejścia widoku renderera (MapRenderer lub TkCanvasRenderer) sterowane przez after()."""
+
+    def __init__(self, root, renderer, enabled=True, duration_ms=DURATION_MS):
+        self.root = root
+        self.renderer = renderer
+        self.enabled = enabled
+        self.duration_ms = duration_ms
+        # Statystyki wszystkich przejść: wyświetlone i opuszczone klatki
+        self.frames = 0
+        self.dropped = 0
+
+        self._finish = None
+        self._job = None
+        self._slow = 0
+
+    @property
+    def running(self):
+        return self._finish is not None
+
+    def animate(self, end, finish, frame=None):
+        """Przejście od bieżącego widoku do `end`, na końcu wywołuje finish().
+
+        `frame` to gotowy obraz widoku końcowego (prefetch), jeśli jest. Bez
+        animacji (wyłączone, brak poprzedniego widoku, ten sam widok) finish()
+        jest wywoływane od razu.
+        """
+        # Przerwane przejście kończy się od razu - nowe startuje z jego widoku końcowego
+        self.complete()
+        start = self.renderer.current_view()
+        if (not self.enabled or start is None or end is None
+                or tuple(float(v) for v in end) == tuple(start)
+                or not self.renderer.begin_transition(end, frame)):
+            finish()
+            return
+
+        self._start = start
+        self._end = tuple(float(v) for v in end)
+        self._finish = finish
+        self._count = 0
+        self._missed = 0
+        self._started = self._last = time.perf_counter()
+        self._job = self.root.after(FRAME_MS, self._tick)
+
+    def _tick(self):
+        now = time.perf_counter()
+        # Pętla Tk była zajęta dłużej niż odstęp klatek - te klatki przepadły
+        late = (now - self._last) * 1000 - FRAME_MS
+        if late > FRAME_MS:
+            self._missed += int(late // FRAME_MS)
+        self._last = now
+
+        elapsed = (now - self._started) * 1000
+        if elapsed >= self.duration_ms:
+            self._job = None
+            self.complete()
+            return
+
+        with span("animacja: klatka"):
+            self.renderer.transition_frame(interpolate_view(self._start, self._end, elapsed / self.duration_ms))
+        cost = (time.perf_counter() - now) * 1000
+        self._count += 1
+        if cost > FRAME_BUDGET_MS:
+            self._missed += 1
+        # Koszt klatki jest odejmowany od odstępu, żeby utrzymać rytm
+        self._job = self.root.after(max(1, int(FRAME_MS - cost)), self._tick)
+
+    def complete(self):
+        """Kończy trwające przejście od razu (wyświetla widok końcowy)."""
+        if self._finish is None:
+            return
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        finish, self._finish = self._finish, None
+        self.renderer.end_transition()
+        self._check_speed()
+        finish()
+
+    def _check_speed(self):
+        self.frames += self._count
+        self.dropped += self._missed
+        total = self._count + self._missed
+        if total == 0:
+            return
+        self._slow = self._slow + 1 if self._missed / total > MAX_DROPPED_FRACTION else 0
+        if self._slow >= SLOW_TRANSITIONS:
+            self.enabled = False
+            print(f"Animacje przejść wyłączone - opuszczono {self.dropped} z {self.frames + self.dropped} klatek")